@@ -1,26 +1,24 @@
 from kuimaze2 import SearchProblem, Map, State
-from typing import List, Tuple, Optional
-import math
+from kuimaze2.costs import is_integral_cost_table
+from typing import Deque, List, Tuple, Optional
+from collections import deque
 import heapq
+import time
 
+import numpy as np
 
-class QueueItem:
-    """
-    Wrapper for a state and the path to reach it.
-    """
-    state: State
-    path: List[State]
+from heuristics import HeuristicFunction, create_heuristic, is_integral
+from node_store import CLOSED, UNSEEN, NodeStore
+from tracing import SearchStats, TraceEvent, Tracer
 
-    def __init__(self, state: State, path_to_state: list[State]) -> None:
-        self.state = state
-        self.path = path_to_state
-
-    def unpack(self) -> tuple[State, list[State]]:
-        return self.state, self.path
 
+"""
+Alias for a tuple containing a state and the cost of the path on which it was pushed.
+"""
+QueueItem = Tuple[State, float]
 
 """
-Alias for a tuple containing a priority and a QueueItem.
+Alias for a tuple containing a priority, a tie-breaking counter and a QueueItem.
 """
 QueueElement = Tuple[float, int, QueueItem]
 
@@ -46,62 +44,229 @@ class PriorityQueue:
         # Returns the item with the highest priority (lowest value)
         return heapq.heappop(self.elements)[2]  # [2] to return the item
 
+    def min_priority(self) -> float:
+        # Lowest priority in the queue (possibly of a stale item), infinity if empty
+        return self.elements[0][0] if self.elements else float("inf")
+
     def is_empty(self) -> bool:
         return len(self.elements) == 0
 
+    def __len__(self) -> int:
+        return len(self.elements)
 
-class Heuristic:
-    @staticmethod
-    def euclidean_distance(current_state: State, goals: set[State]) -> float:
-        """
-        Euclidean distance heuristic for A* search.
-        """
-        return min(math.sqrt((current_state.r - goal.r) ** 2 + (current_state.c - goal.c) ** 2) for goal in goals)
+
+class BucketQueue:
+    """
+    Bucket queue (Dial's algorithm) for non-negative integer priorities.
+
+    A drop-in alternative to PriorityQueue with O(1) amortized push and pop.
+    Items with the same priority are popped in the insertion order, as from PriorityQueue.
+    """
+    buckets: List[Optional[Deque[QueueItem]]]
+    current: int
+    size: int
+
+    def __init__(self) -> None:
+        self.buckets = []  # Buckets are created on demand and released when emptied
+        self.current = 0  # Index of the lowest possibly non-empty bucket
+        self.size = 0
+
+    def push(self, item: QueueItem, priority: float) -> None:
+        index = int(priority)
+        assert index == priority and index >= 0, f"BucketQueue: priority must be a non-negative integer, got {priority}"
+        if index >= len(self.buckets):
+            self.buckets.extend([None] * (index + 1 - len(self.buckets)))
+        if self.buckets[index] is None:
+            self.buckets[index] = deque()
+        self.buckets[index].append(item)
+        self.current = min(self.current, index)
+        self.size += 1
+
+    def pop(self) -> QueueItem:
+        while not self.buckets[self.current]:
+            self.buckets[self.current] = None
+            self.current += 1
+        self.size -= 1
+        return self.buckets[self.current].popleft()
+
+    def min_priority(self) -> float:
+        # Lowest priority in the queue (possibly of a stale item), infinity if empty
+        if self.size == 0:
+            return float("inf")
+        while not self.buckets[self.current]:
+            self.buckets[self.current] = None
+            self.current += 1
+        return self.current
+
+    def is_empty(self) -> bool:
+        return self.size == 0
+
+    def __len__(self) -> int:
+        return self.size
+
+
+def has_integral_costs(environment: SearchProblem) -> bool:
+    """
+    Return True if all finite transition costs of the environment are integers.
+    """
+    return is_integral_cost_table(environment.cost_table)
+
+
+def create_frontier(environment: SearchProblem, integral_heuristic: bool) -> PriorityQueue | BucketQueue:
+    """
+    Use the BucketQueue if all priorities are integers, i.e., the heuristic values
+    and the costs of the environment are, the heapq-based PriorityQueue otherwise.
+    """
+    if integral_heuristic and has_integral_costs(environment):
+        return BucketQueue()
+    return PriorityQueue()
+
+
+def create_node_store(environment: SearchProblem) -> NodeStore:
+    """
+    Create a NodeStore for the states of the environment, with float32 costs if they stay exact.
+    """
+    max_cost = None
+    if has_integral_costs(environment):
+        costs = environment.cost_table
+        finite = costs[np.isfinite(costs)]
+        max_cost = float(finite.max()) * len(costs) if len(finite) else 0
+    return NodeStore(environment.map, max_cost)
+
+
+def reconstruct_path(parents: dict[State, Optional[State]], goal: State) -> list[State]:
+    """
+    Follow the parent pointers from the goal back to the start and return the path from the start.
+    """
+    path = []
+    state: Optional[State] = goal
+    while state is not None:
+        path.append(state)
+        state = parents[state]
+    path.reverse()
+    return path
 
 
 class Agent:
 
-    def __init__(self, environment: SearchProblem) -> None:
+    def __init__(self,
+                 environment: SearchProblem,
+                 heuristic: HeuristicFunction | str = "euclidean",
+                 tracer: Optional[Tracer] = None) -> None:
+        """
+        Create an A* agent; the heuristic is either a function or a name of a metric from heuristics.METRICS.
+
+        By default, the search only counts its events; pass a Tracer to write them to a trace file.
+        """
         self.environment = environment
+        self.heuristic = create_heuristic(heuristic) if isinstance(heuristic, str) else heuristic
+        self.tracer = tracer or Tracer()
+        # Statistics of the last search
+        self.stats = SearchStats()
+
+    @property
+    def expansions(self) -> int:
+        return self.stats.expansions
+
+    @property
+    def stale_skipped(self) -> int:
+        return self.stats.stale_skipped
+
+    @property
+    def reopenings(self) -> int:
+        return self.stats.reopenings
 
     def find_path(self) -> Optional[list[State]]:
-        start_state = self.environment.get_start()
+        return self.find_path_with_stats()[0]
+
+    def find_path_with_stats(self) -> tuple[Optional[list[State]], SearchStats]:
+        """
+        Search for the path like `find_path`, and return it together with the statistics of the search.
+        """
+        started = time.perf_counter()
+        start_state = self.environment.map.states.canonical(self.environment.get_start())
         goals = self.environment.get_goals()
         print(f"Starting A* search from {start_state} aiming for goals: {goals}")
 
-        pq = PriorityQueue()
-        pq.push(
-            QueueItem(start_state, []),
-            Heuristic.euclidean_distance(start_state, goals)
-        )
+        self.stats = stats = SearchStats()
+        if not self.environment.is_goal_reachable(start_state):
+            print("No path found to the goal: no goal is reachable from the start.")
+            return self._finish(None, started)
 
-        costs = {start_state: 0}
+        tracer = self.tracer
+        trace_expansions = tracer.traces(TraceEvent.EXPAND)
+        trace_all = tracer.traces(TraceEvent.PUSH)
+        pq = create_frontier(self.environment, is_integral(self.heuristic))
+        pq.push((start_state, 0), self.heuristic(start_state, goals))
+        stats.pushes = stats.peak_frontier = 1
+        if trace_all:
+            tracer.record(TraceEvent.PUSH, start_state, 0)
+
+        # Costs, parents (the path is rebuilt only for the goal) and statuses of the states, by state ids
+        nodes = create_node_store(self.environment)
+        g, status = nodes.g, nodes.status
+        nodes.reach(start_state.id, 0)
 
         while not pq.is_empty():
-            current_state, current_path = pq.pop().unpack()
-            current_cost = costs[current_state]
+            current_state, pushed_cost = pq.pop()
+            current = current_state.id
+            current_cost = g[current]
 
-            print(f"Exploring state: {current_state} with current cost: {current_cost}")
+            # Lazy deletion: the state was pushed again with a lower cost since this entry was pushed
+            if pushed_cost > current_cost:
+                stats.stale_skipped += 1
+                if trace_all:
+                    tracer.record(TraceEvent.STALE, current_state, pushed_cost)
+                continue
+            stats.expansions += 1
+            if status[current] == CLOSED:
+                # Only possible with an inconsistent heuristic; the state is reopened with a lower cost
+                stats.reopenings += 1
+                if trace_all:
+                    tracer.record(TraceEvent.REOPEN, current_state, current_cost)
+            status[current] = CLOSED
+            if trace_expansions:
+                tracer.record(TraceEvent.EXPAND, current_state, current_cost)
 
             if self.environment.is_goal(current_state):
-                final_path = current_path + [current_state]
+                final_path = nodes.path_to(current)
+                stats.path_cost = current_cost
+                stats.path_length = len(final_path)
                 print(f"Goal found! Path: {final_path}")
-                return final_path
+                return self._finish(final_path, started)
 
-            for action in self.environment.get_actions(current_state):
-                new_state, action_cost = self.environment.get_transition_result(current_state, action)
+            # Successors come in the order of actions, so the index is the action leading to the successor
+            for action, (new_state, action_cost) in enumerate(self.environment.get_successors(current_state)):
                 new_cost = current_cost + action_cost
+                new = new_state.id
 
-                if new_state not in costs or new_cost < costs[new_state]:
-                    costs[new_state] = new_cost
-                    pq.push(
-                        QueueItem(new_state, current_path + [current_state]),
-                        new_cost + Heuristic.euclidean_distance(new_state, goals)
-                    )
-                    print(f"Adding state: {new_state} with new cost: {new_cost}")
+                if status[new] == UNSEEN or new_cost < g[new]:
+                    nodes.reach(new, new_cost, action)
+                    priority = new_cost + self.heuristic(new_state, goals)
+                    if priority == float("inf"):
+                        # The heuristic proves that no goal is reachable from the state
+                        continue
+                    pq.push((new_state, new_cost), priority)
+                    stats.pushes += 1
+                    if len(pq) > stats.peak_frontier:
+                        stats.peak_frontier = len(pq)
+                    if trace_all:
+                        tracer.record(TraceEvent.PUSH, new_state, new_cost)
 
         print("No path found to the goal.")
-        return None
+        return self._finish(None, started)
+
+    def _finish(self, path: Optional[list[State]], started: float) -> tuple[Optional[list[State]], SearchStats]:
+        self.stats.elapsed = time.perf_counter() - started
+        self.tracer.finish(self.stats)
+        self._print_stats()
+        return path, self.stats
+
+    def _print_stats(self) -> None:
+        stats = self.stats
+        print(f"Expanded {stats.expansions} states ({stats.reopenings} reopened), "
+              f"skipped {stats.stale_skipped} stale frontier entries; pushed {stats.pushes} states, "
+              f"at most {stats.peak_frontier} in the frontier; {stats.elapsed:.3f} s.")
 
 
 if __name__ == "__main__":
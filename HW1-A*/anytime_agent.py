@@ -0,0 +1,163 @@
+from kuimaze2 import SearchProblem, Map, State
+from typing import Optional
+import time
+
+from agent import PriorityQueue, reconstruct_path
+from heuristics import HeuristicFunction, create_heuristic
+
+
+class AnytimeAgent:
+    """
+    Anytime Repairing A* (ARA*) with a time and/or expansion budget.
+
+    The first solution is found quickly by weighted A* with priorities g + weight * h;
+    then the weight is decreased step by step down to 1 and the solution is improved,
+    reusing the costs found so far: only the states whose cost decreased since they were
+    expanded (the inconsistent ones) are searched again. When the budget runs out, the best
+    path found so far is returned and `bound` holds its proven suboptimality bound, i.e.,
+    the path costs at most `bound` times the optimal cost (with an admissible heuristic).
+    """
+
+    def __init__(self,
+                 environment: SearchProblem,
+                 heuristic: HeuristicFunction | str = "euclidean",
+                 initial_weight: float = 3.0,
+                 weight_step: float = 0.5,
+                 time_limit: Optional[float] = None,
+                 max_expansions: Optional[int] = None) -> None:
+        """
+        Create the agent; the time limit is in seconds of wall-clock time, no limit if None.
+        """
+        self.environment = environment
+        self.heuristic = create_heuristic(heuristic) if isinstance(heuristic, str) else heuristic
+        self.initial_weight = max(initial_weight, 1.0)
+        self.weight_step = weight_step
+        self.time_limit = time_limit
+        self.max_expansions = max_expansions
+        # Results and statistics of the last search
+        self.bound = float("inf")
+        self.path_cost = float("inf")
+        self.solutions: list[tuple[float, float, float]] = []  # (elapsed seconds, path cost, bound)
+        self.path: Optional[list[State]] = None
+        self.expansions = 0
+
+    def find_path(self) -> Optional[list[State]]:
+        self._started = time.perf_counter()
+        start_state = self.environment.get_start()
+        goals = self.environment.get_goals()
+        print(f"Starting ARA* search from {start_state} aiming for goals: {goals}")
+
+        self.bound = self.path_cost = float("inf")
+        self.solutions = []
+        self.path = None
+        self.expansions = 0
+        if not self.environment.is_goal_reachable(start_state):
+            print("No path found to the goal: no goal is reachable from the start.")
+            return None
+
+        self._goals = goals
+        self._costs: dict[State, float] = {start_state: 0}
+        self._parents: dict[State, Optional[State]] = {start_state: None}
+        self._best_goal: Optional[State] = start_state if start_state in goals else None
+        self._open: set[State] = {start_state}
+        self._inconsistent: set[State] = set()
+
+        weight = self.initial_weight
+        while True:
+            self._frontier = PriorityQueue()
+            for state in self._open:
+                self._frontier.push((state, self._costs[state]), self._priority(state, weight))
+            self._closed: set[State] = set()
+            completed = self._improve_path(weight)
+            if self._best_goal is not None:
+                self._record_solution(weight if completed else float("inf"))
+            if not completed or self.bound <= 1 or (self._best_goal is None and not self._open):
+                break
+            # Decrease the weight and search again from all states whose cost decreased
+            weight = max(1.0, weight - self.weight_step)
+            self._open |= self._inconsistent
+            self._inconsistent = set()
+
+        if self.path is None:
+            print(f"No path found to the goal. Expanded {self.expansions} states.")
+            return None
+        print(f"Path of cost {self.path_cost} found, at most {self.bound:.3f} times the optimal cost. "
+              f"Expanded {self.expansions} states.")
+        return self.path
+
+    def _priority(self, state: State, weight: float) -> float:
+        return self._costs[state] + weight * self.heuristic(state, self._goals)
+
+    def _goal_cost(self) -> float:
+        return float("inf") if self._best_goal is None else self._costs[self._best_goal]
+
+    def _budget_exhausted(self) -> bool:
+        if self.max_expansions is not None and self.expansions >= self.max_expansions:
+            return True
+        return self.time_limit is not None and time.perf_counter() - self._started >= self.time_limit
+
+    def _improve_path(self, weight: float) -> bool:
+        """
+        Run weighted A* until the best goal is proven within the weight; return False if the budget ran out.
+        """
+        while self._open:
+            if self._goal_cost() <= self._frontier.min_priority():
+                return True
+            state, pushed_cost = self._frontier.pop()
+            if state not in self._open or pushed_cost > self._costs[state]:  # Stale frontier entry
+                continue
+            if self._budget_exhausted():
+                self._frontier.push((state, pushed_cost), self._priority(state, weight))
+                return False
+            self._open.remove(state)
+            self._closed.add(state)
+            self.expansions += 1
+            cost = self._costs[state]
+            for new_state, transition_cost in self.environment.get_successors(state):
+                new_cost = cost + transition_cost
+                if new_state in self._costs and new_cost >= self._costs[new_state]:
+                    continue
+                self._costs[new_state] = new_cost
+                self._parents[new_state] = state
+                if new_state in self._goals:
+                    # Goals are never expanded, their cost is final once reached by the best path
+                    if new_cost < self._goal_cost():
+                        self._best_goal = new_state
+                elif new_state in self._closed:
+                    self._inconsistent.add(new_state)
+                elif self.heuristic(new_state, self._goals) < float("inf"):
+                    self._open.add(new_state)
+                    self._frontier.push((new_state, new_cost), self._priority(new_state, weight))
+        return True
+
+    def _record_solution(self, weight: float) -> None:
+        """
+        Store the best path, its cost and bound: the weight of a completed iteration, or, at any time,
+        the ratio to a lower bound on the optimal cost from the states not yet settled.
+        """
+        lower_bound = min((self._priority(state, 1.0) for state in self._open | self._inconsistent),
+                          default=float("inf"))
+        # Costs of the states on the path may have decreased since the goal was reached,
+        # so the path may be cheaper than the cost of the goal
+        self.path = reconstruct_path(self._parents, self._best_goal)
+        states = self.environment.map.states
+        cost_table = self.environment.cost_table
+        self.path_cost = sum(cost_table.item(states.id_of(state)) for state in self.path[:-1])
+        if self.path_cost == 0:
+            ratio = 1.0
+        else:
+            ratio = self.path_cost / lower_bound if lower_bound > 0 else float("inf")
+        self.bound = max(1.0, min(weight, ratio, self.bound))
+        self.solutions.append((time.perf_counter() - self._started, self.path_cost, self.bound))
+
+
+if __name__ == "__main__":
+    MAP = """
+    .S...
+    .###.
+    ...#G
+    """
+    env = SearchProblem(Map.from_string(MAP), graphics=False)
+    agent = AnytimeAgent(env, time_limit=0.1)
+    path = agent.find_path()
+    print(f"Final path: {path}")
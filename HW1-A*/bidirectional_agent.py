@@ -0,0 +1,151 @@
+from kuimaze2 import SearchProblem, Map, State
+from typing import Callable, Optional
+
+from agent import create_frontier, reconstruct_path
+from heuristics import HeuristicFunction, create_heuristic, is_integral
+
+
+"""
+Alias for a function returning the neighbors of a state and the costs of moving to them.
+"""
+Neighbors = Callable[[State], list[tuple[State, float]]]
+
+
+class SearchDirection:
+    """
+    One half of a bidirectional search: A* from the sources with priorities 2 * cost + potential.
+    """
+
+    def __init__(self,
+                 environment: SearchProblem,
+                 sources: set[State],
+                 potential: Callable[[State], float],
+                 integral: bool,
+                 neighbors: Neighbors) -> None:
+        self.potential = potential
+        self.neighbors = neighbors
+        self.frontier = create_frontier(environment, integral)
+        self.costs: dict[State, float] = {}
+        self.parents: dict[State, Optional[State]] = {}
+        self.expansions = 0
+        for source in sources:
+            self.costs[source] = 0
+            self.parents[source] = None
+            self.frontier.push((source, 0), potential(source))
+
+    def expand_next(self, other: "SearchDirection", best: tuple[float, Optional[State]]) -> tuple[float, Optional[State]]:
+        """
+        Expand the best state of the frontier; return the updated (cost, meeting state) of the best path found.
+        """
+        state, pushed_cost = self.frontier.pop()
+        cost = self.costs[state]
+        if pushed_cost > cost:  # Stale frontier entry
+            return best
+        self.expansions += 1
+        for new_state, transition_cost in self.neighbors(state):
+            new_cost = cost + transition_cost
+            if new_state not in self.costs or new_cost < self.costs[new_state]:
+                self.costs[new_state] = new_cost
+                self.parents[new_state] = state
+                self.frontier.push((new_state, new_cost), 2 * new_cost + self.potential(new_state))
+                if new_state in other.costs and new_cost + other.costs[new_state] < best[0]:
+                    best = (new_cost + other.costs[new_state], new_state)
+        return best
+
+
+class BidirectionalAgent:
+    """
+    Bidirectional A*: a forward search from the start and a backward search from all goals.
+
+    The backward search uses the reverse transitions of the map (`SearchProblem.get_predecessors`)
+    with the costs of the original transitions. Both searches use the average potential
+    p(s) = h_goals(s) - h_start(s) (doubled to keep integral heuristics integral):
+    the forward search orders states by 2 * g(s) + p(s), the backward one by 2 * g(s) - p(s).
+    The potentials are consistent whenever the heuristic is, so the search can stop as soon as
+    the sum of the lowest priorities of both frontiers reaches twice the cost of the best path found;
+    with an admissible and consistent heuristic, that path is optimal.
+    """
+
+    def __init__(self,
+                 environment: SearchProblem,
+                 heuristic: HeuristicFunction | str = "euclidean") -> None:
+        """
+        Create the agent; the heuristic is either a function or a name of a metric from heuristics.METRICS.
+        """
+        self.environment = environment
+        # Each direction needs its own heuristic instance, as they aim at different targets
+        if isinstance(heuristic, str):
+            self.forward_heuristic = create_heuristic(heuristic)
+            self.backward_heuristic = create_heuristic(heuristic)
+        else:
+            self.forward_heuristic = self.backward_heuristic = heuristic
+        # Statistics of the last search
+        self.expansions = 0
+
+    def find_path(self) -> Optional[list[State]]:
+        start_state = self.environment.get_start()
+        goals = self.environment.get_goals()
+        print(f"Starting bidirectional A* search from {start_state} aiming for goals: {goals}")
+
+        self.expansions = 0
+        if self.environment.is_goal(start_state):
+            return [start_state]
+        if not self.environment.is_goal_reachable(start_state):
+            print("No path found to the goal: no goal is reachable from the start.")
+            return None
+
+        start_set = {start_state}
+
+        def potential(state: State) -> float:
+            return self.forward_heuristic(state, goals) - self.backward_heuristic(state, start_set)
+
+        integral = is_integral(self.forward_heuristic) and is_integral(self.backward_heuristic)
+        forward = SearchDirection(self.environment, start_set, potential, integral, self._forward_neighbors)
+        backward = SearchDirection(self.environment, goals, lambda state: -potential(state), integral,
+                                   self._backward_neighbors)
+        best: tuple[float, Optional[State]] = (float("inf"), None)
+
+        while not forward.frontier.is_empty() and not backward.frontier.is_empty():
+            forward_min, backward_min = forward.frontier.min_priority(), backward.frontier.min_priority()
+            if forward_min + backward_min >= 2 * best[0]:
+                break
+            if forward_min <= backward_min:
+                best = forward.expand_next(backward, best)
+            else:
+                best = backward.expand_next(forward, best)
+
+        self.expansions = forward.expansions + backward.expansions
+        cost, meeting_state = best
+        if meeting_state is None:
+            print(f"No path found to the goal. Expanded {self.expansions} states.")
+            return None
+        path = reconstruct_path(forward.parents, meeting_state)
+        state = backward.parents[meeting_state]
+        while state is not None:
+            path.append(state)
+            state = backward.parents[state]
+        print(f"Path of cost {cost} found. Expanded {self.expansions} states.")
+        return path
+
+    def _forward_neighbors(self, state: State) -> list[tuple[State, float]]:
+        # Goals are where the backward search starts, paths need not continue past them
+        if self.environment.is_goal(state):
+            return []
+        return [(new_state, cost) for new_state, cost in self.environment.get_successors(state) if new_state != state]
+
+    def _backward_neighbors(self, state: State) -> list[tuple[State, float]]:
+        # Goals are all sources of the backward search already
+        return [(new_state, cost) for new_state, cost in self.environment.get_predecessors(state)
+                if not self.environment.is_goal(new_state)]
+
+
+if __name__ == "__main__":
+    MAP = """
+    .S...
+    .###.
+    ...#G
+    """
+    env = SearchProblem(Map.from_string(MAP), graphics=False)
+    agent = BidirectionalAgent(env)
+    path = agent.find_path()
+    print(f"Final path: {path}")
@@ -0,0 +1,226 @@
+from kuimaze2 import SearchProblem, GridMap, State
+from kuimaze2.map import Role, ROLE_CODE
+from typing import Iterable, Optional
+import heapq
+
+from heuristics import HeuristicFunction, create_heuristic
+
+
+"""
+Alias for a cost to the goals extended by the number of steps: (cost, steps), compared lexicographically.
+Every transition adds at least (0, 1), so even with zero costs, costs strictly decrease towards
+the goals and states cannot keep up each other's costs in a cycle after an edit.
+"""
+Value = tuple[float, int]
+
+"""
+Alias for a D* Lite priority: (min(g, rhs) + h + km, min(g, rhs)), compared lexicographically;
+the heuristic and km are added to the cost only.
+"""
+Key = tuple[float, int, float, int]
+
+INF = float("inf")
+
+"""
+Value of states from which no goal is reachable.
+"""
+UNREACHABLE: Value = (INF, 0)
+
+"""
+Best successor of goals and of states from which no goal is reachable.
+"""
+NO_SUCCESSOR = -1
+
+
+class DStarLiteAgent:
+    """
+    D* Lite: incremental replanning while the agent moves and the map changes.
+
+    The search runs backwards from the goals, so the costs to the goals (g) stay valid
+    when the agent moves. After the roles of some cells change (see `set_roles`, or edits
+    made directly on the GridMap of the environment), only these cells are updated and
+    the search repairs just the part of the search tree whose costs changed; the rest
+    of the earlier work is reused. Call `move_to` whenever the agent moves, and `find_path`
+    to get the current shortest path from the agent's position.
+    """
+
+    def __init__(self,
+                 environment: SearchProblem,
+                 heuristic: HeuristicFunction | str = "manhattan") -> None:
+        """
+        Create the agent; the heuristic must be consistent, e.g., a name of a metric from heuristics.METRICS.
+        """
+        self.environment = environment
+        self.heuristic = create_heuristic(heuristic) if isinstance(heuristic, str) else heuristic
+        self.position: Optional[State] = None
+        # Statistics of the last call of find_path
+        self.expansions = 0
+        self.updated_cells = 0
+        self._initialized = False
+
+    def set_roles(self, edits: Iterable[tuple[State, Role]]) -> None:
+        """
+        Change roles of cells of the map (a GridMap); the path is repaired by the next `find_path`.
+        """
+        self.environment.map.set_roles(edits)
+
+    def move_to(self, state: State) -> None:
+        """
+        Tell the agent it moved to the state (usually the next state of the last path).
+        """
+        state = self.environment.map.states.canonical(state)
+        if self._initialized:
+            # Keys already in the queue were computed from the previous position, they may be too high by this much
+            self._km += self.heuristic(self.position, {state})
+        self.position = state
+
+    def find_path(self) -> Optional[list[State]]:
+        if self.position is None:
+            self.position = self.environment.map.states.canonical(self.environment.get_start())
+        print(f"Planning with D* Lite from {self.position} aiming for goals: {self.environment.get_goals()}")
+
+        self.expansions = self.updated_cells = 0
+        if not self._initialized or not self._update_changed_cells():
+            self._initialize()
+        self._position_set = {self.position}
+        self._compute_shortest_path()
+
+        path = self._extract_path()
+        if path is None:
+            print(f"No path found to the goal. Expanded {self.expansions} states.")
+        else:
+            print(f"Path of cost {self._g.get(self.position.id, UNREACHABLE)[0]} found. Expanded {self.expansions} states, "
+                  f"updated {self.updated_cells} changed cells.")
+        return path
+
+    def _initialize(self) -> None:
+        map = self.environment.map
+        self._version = map.version
+        self._goal_code = ROLE_CODE[Role.GOAL]
+        self._km = 0.0
+        self._g: dict[int, Value] = {}
+        self._rhs: dict[int, Value] = {}
+        self._next: dict[int, int] = {}  # Successor through which rhs was computed, see `_lookahead`
+        self._queue: list[tuple[float, int, float, int, int]] = []
+        self._queued: dict[int, Key] = {}  # Current key of each queued state, for lazy deletion
+        self._position_set = {self.position}
+        for goal in self.environment.get_goals():
+            self._rhs[goal.id] = (0.0, 0)
+            self._push(goal.id)
+        self._initialized = True
+
+    def _update_changed_cells(self) -> bool:
+        """
+        Update the states whose role or borders changed since the last search; False if the changes are unknown.
+        """
+        map = self.environment.map
+        changed = map.changed_ids_since(self._version)
+        if changed is None:
+            return False
+        self._version = map.version
+        self._position_set = {self.position}
+        # The costs and successors of a changed state changed; its predecessors changed their borders if needed
+        for id in changed.tolist():
+            self._update_state(id)
+        self.updated_cells = len(changed)
+        return True
+
+    def _is_goal(self, id: int) -> bool:
+        return self.environment.map.role_grid.item(*divmod(id, self.environment.map.width)) == self._goal_code
+
+    def _key(self, id: int) -> Key:
+        cost, steps = min(self._g.get(id, UNREACHABLE), self._rhs.get(id, UNREACHABLE))
+        state = self.environment.map.states[id]
+        return (cost + self.heuristic(state, self._position_set) + self._km, steps, cost, steps)
+
+    def _push(self, id: int) -> None:
+        key = self._key(id)
+        self._queued[id] = key
+        heapq.heappush(self._queue, (*key, id))
+
+    def _top_key(self) -> Key:
+        while self._queue:
+            key = self._queue[0][:4]
+            if self._queued.get(self._queue[0][4]) == key:
+                return key
+            heapq.heappop(self._queue)  # Stale queue entry
+        return (INF, 0, INF, 0)
+
+    def _lookahead(self, id: int) -> tuple[Value, int]:
+        """
+        Return the cost to the goals through the best successor of the state (rhs), and that successor.
+        """
+        if self._is_goal(id):
+            return (0.0, 0), NO_SUCCESSOR
+        cost = self.environment.cost_table.item(id)
+        if cost == INF:
+            return UNREACHABLE, NO_SUCCESSOR
+        best, best_successor = UNREACHABLE, NO_SUCCESSOR
+        for successor in self.environment.map.successor_table[id].tolist():
+            successor_cost, successor_steps = self._g.get(successor, UNREACHABLE)
+            if successor != id and successor_cost < INF and (cost + successor_cost, successor_steps + 1) < best:
+                best, best_successor = (cost + successor_cost, successor_steps + 1), successor
+        return best, best_successor
+
+    def _update_state(self, id: int) -> None:
+        self._rhs[id], self._next[id] = self._lookahead(id)
+        if self._g.get(id, UNREACHABLE) != self._rhs[id]:
+            self._push(id)
+        else:
+            self._queued.pop(id, None)
+
+    def _compute_shortest_path(self) -> None:
+        predecessor_table = self.environment.map.predecessor_table
+        start = self.position.id
+        while self._top_key() < self._key(start) or self._rhs.get(start, UNREACHABLE) != self._g.get(start, UNREACHABLE):
+            *key, id = heapq.heappop(self._queue)
+            del self._queued[id]
+            if tuple(key) < self._key(id):
+                # The key was computed before the agent moved
+                self._push(id)
+                continue
+            self.expansions += 1
+            g, rhs = self._g.get(id, UNREACHABLE), self._rhs.get(id, UNREACHABLE)
+            if g > rhs:
+                self._g[id] = rhs
+            else:
+                self._g[id] = UNREACHABLE
+                self._update_state(id)
+            for predecessor in predecessor_table[id].tolist():
+                if predecessor >= 0:
+                    self._update_state(predecessor)
+
+    def _extract_path(self) -> Optional[list[State]]:
+        """
+        Follow the recorded best successors (see `_lookahead`) from the agent's position to a goal.
+        """
+        map = self.environment.map
+        id = self.position.id
+        if self._g.get(id, UNREACHABLE) == UNREACHABLE:
+            return None
+        path = [map.states[id]]
+        visited = {id}
+        while not self._is_goal(id):
+            id = self._next.get(id, NO_SUCCESSOR)
+            if id == NO_SUCCESSOR or id in visited:
+                return None  # Cannot happen for consistent states; do not loop if it does
+            visited.add(id)
+            path.append(map.states[id])
+        return path
+
+
+if __name__ == "__main__":
+    MAP = """
+    .S...
+    .###.
+    ...#G
+    """
+    env = SearchProblem(GridMap.from_string(MAP), graphics=False)
+    agent = DStarLiteAgent(env)
+    path = agent.find_path()
+    print(f"Final path: {path}")
+    # Move one step, then put a danger on the way and replan
+    agent.move_to(path[1])
+    agent.set_roles([(State(0, 4), Role.DANGER)])
+    path = agent.find_path()
+    print(f"Replanned path: {path}")
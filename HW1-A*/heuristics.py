@@ -0,0 +1,191 @@
+from kuimaze2 import SearchProblem, Map, State
+from kuimaze2.landmarks import LandmarkTables
+from typing import Callable, Optional
+import math
+import os
+
+import numpy as np
+
+
+"""
+Alias for a heuristic: an estimate of the cost from a state to the nearest of the goals.
+"""
+HeuristicFunction = Callable[[State, set[State]], float]
+
+"""
+Alias for a distance metric of absolute row and column differences (scalars or NumPy arrays).
+"""
+Metric = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+
+def manhattan(dr: np.ndarray, dc: np.ndarray) -> np.ndarray:
+    """
+    Manhattan distance; exact on empty maps with unit costs and 4-connected moves.
+    """
+    return dr + dc
+
+
+def euclidean(dr: np.ndarray, dc: np.ndarray) -> np.ndarray:
+    """
+    Euclidean (straight line) distance.
+    """
+    return np.sqrt(dr * dr + dc * dc)
+
+
+def octile(dr: np.ndarray, dc: np.ndarray) -> np.ndarray:
+    """
+    Octile distance, i.e., the distance with diagonal moves of cost sqrt(2) allowed.
+    """
+    return dr + dc + (math.sqrt(2) - 2) * np.minimum(dr, dc)
+
+
+METRICS: dict[str, Metric] = {
+    "manhattan": manhattan,
+    "euclidean": euclidean,
+    "octile": octile,
+}
+
+"""
+Metrics returning only integers; together with integral costs, they allow using the BucketQueue.
+"""
+INTEGRAL_METRICS = {"manhattan"}
+
+"""
+With fewer goals, computing the distances one by one is faster than with NumPy arrays.
+"""
+VECTORIZE_MIN_GOALS = 16
+
+
+class GoalDistanceHeuristic:
+    """
+    Distance from a state to the nearest goal in the given metric.
+
+    The goals are kept in NumPy arrays and the minimum over all of them is vectorized,
+    the values are memoized per state. The goals are re-read whenever a different
+    set of goals is passed in.
+    """
+    name: str
+    metric: Metric
+    integral: bool
+
+    def __init__(self, name: str = "euclidean") -> None:
+        if name not in METRICS:
+            raise ValueError(f"Unknown heuristic {name!r}, choose one of {list(METRICS)}")
+        self.name = name
+        self.metric = METRICS[name]
+        self.integral = name in INTEGRAL_METRICS
+        self._goals: Optional[set[State]] = None
+        self._goal_list: list[State] = []
+        self._goal_rows = np.empty(0, dtype=np.int64)
+        self._goal_cols = np.empty(0, dtype=np.int64)
+        self._memo: dict[State, float] = {}
+
+    def __call__(self, state: State, goals: set[State]) -> float:
+        if goals is not self._goals:
+            self._set_goals(goals)
+        value = self._memo.get(state)
+        if value is None:
+            if len(self._goal_list) < VECTORIZE_MIN_GOALS:
+                value = min(float(self.metric(abs(state.r - goal.r), abs(state.c - goal.c))) for goal in self._goal_list)
+            else:
+                value = float(self.metric(np.abs(self._goal_rows - state.r), np.abs(self._goal_cols - state.c)).min())
+            self._memo[state] = value
+        return value
+
+    def _set_goals(self, goals: set[State]) -> None:
+        if self._goals is not None and goals == self._goals:
+            self._goals = goals
+            return
+        self._goals = goals
+        self._goal_list = list(goals)
+        self._goal_rows = np.array([goal.r for goal in self._goal_list], dtype=np.int64)
+        self._goal_cols = np.array([goal.c for goal in self._goal_list], dtype=np.int64)
+        self._memo.clear()
+
+
+def landmark_bound(costs: list[float], goal_costs: list[float]) -> float:
+    """
+    Return the lower bound on the cost between two states with the given costs to the landmarks.
+    """
+    bound = 0.0
+    for cost, goal_cost in zip(costs, goal_costs):
+        # A landmark unreachable from both states tells nothing
+        if goal_cost != math.inf and cost - goal_cost > bound:
+            bound = cost - goal_cost
+    return bound
+
+
+class LandmarkHeuristic:
+    """
+    ALT heuristic: the lower bound on the cost to the nearest goal from the triangle inequality
+    with precomputed landmark tables, max over landmarks L of cost(state, L) - cost(goal, L).
+
+    Much tighter than the metrics on maze-like maps with dead ends. The values are memoized per state.
+    """
+    tables: LandmarkTables
+    integral: bool
+
+    def __init__(self, tables: LandmarkTables, map: Map) -> None:
+        self.tables = tables
+        self._states = map.states
+        self.integral = tables.integral
+        self._goals: Optional[set[State]] = None
+        self._goal_costs = np.empty((0, len(tables.landmarks)))
+        self._goal_rows: list[list[float]] = []
+        self._memo: dict[State, float] = {}
+
+    def __call__(self, state: State, goals: set[State]) -> float:
+        if goals is not self._goals:
+            self._set_goals(goals)
+        value = self._memo.get(state)
+        if value is None:
+            id = self._states.id_of(state)
+            if len(self._goal_rows) < VECTORIZE_MIN_GOALS:
+                costs = self.tables.costs_of(id).tolist()
+                value = min((landmark_bound(costs, goal_costs) for goal_costs in self._goal_rows), default=math.inf)
+            else:
+                with np.errstate(invalid="ignore"):
+                    # Landmarks unreachable from both states give NaN and are ignored
+                    differences = self.tables.costs_of(id) - self._goal_costs
+                value = float(np.fmax.reduce(differences, axis=1, initial=0).min())
+            self._memo[state] = value
+        return value
+
+    def _set_goals(self, goals: set[State]) -> None:
+        if self._goals is not None and goals == self._goals:
+            self._goals = goals
+            return
+        self._goals = goals
+        self._goal_costs = self.tables.costs_of(np.array([self._states.id_of(goal) for goal in goals], dtype=np.int64))
+        self._goal_rows = self._goal_costs.tolist()
+        self._memo.clear()
+
+
+def create_landmark_heuristic(environment: SearchProblem,
+                              count: int = 8,
+                              map_path: Optional[os.PathLike] = None) -> LandmarkHeuristic:
+    """
+    Create the ALT heuristic with `count` landmarks for the environment.
+
+    If the path of the map file is given, the tables are saved next to it and reused by later calls.
+    """
+    map, cost_table = environment.map, environment.cost_table
+    if map_path is None:
+        tables = LandmarkTables.compute(map, cost_table, count)
+    else:
+        tables = LandmarkTables.for_map_file(map_path, map, cost_table, count)
+    return LandmarkHeuristic(tables, map)
+
+
+def create_heuristic(name: str) -> GoalDistanceHeuristic:
+    """
+    Create a heuristic by the name of its metric, see METRICS.
+    """
+    return GoalDistanceHeuristic(name)
+
+
+def is_integral(heuristic: HeuristicFunction) -> bool:
+    """
+    Return True if the heuristic is known to return only integers.
+    """
+    return getattr(heuristic, "integral", False)
@@ -0,0 +1,162 @@
+from kuimaze2 import SearchProblem, Map, State
+from kuimaze2.hierarchy import ClusterAbstraction
+from typing import Iterator, Optional
+import heapq
+
+from heuristics import HeuristicFunction, create_heuristic
+
+
+class HPAAgent:
+    """
+    Hierarchical pathfinding (HPA*) on a cluster abstraction of the map.
+
+    The start and goals are connected to the nodes of their clusters by searches inside
+    the clusters, then A* runs on the small abstract graph, and only then is the abstract
+    path refined to cells, one segment at a time (see `refine`). Paths are near-optimal:
+    they may be a little longer than the optimal ones, as they pass through the chosen
+    entrances of the clusters. The abstraction is built once and rebuilt per cluster
+    when the map is edited.
+    """
+
+    def __init__(self,
+                 environment: SearchProblem,
+                 heuristic: HeuristicFunction | str = "euclidean",
+                 cluster_size: int = 16,
+                 abstraction: Optional[ClusterAbstraction] = None) -> None:
+        """
+        Create the agent; an abstraction of the map may be shared by several agents.
+        """
+        self.environment = environment
+        self.heuristic = create_heuristic(heuristic) if isinstance(heuristic, str) else heuristic
+        self.abstraction = abstraction or ClusterAbstraction(environment.map, environment.cost_table, cluster_size)
+        # Statistics of the last search
+        self.expansions = 0
+        self.rebuilt_clusters = 0
+
+    def find_path(self) -> Optional[list[State]]:
+        start_state = self.environment.get_start()
+        goals = self.environment.get_goals()
+        print(f"Starting HPA* search from {start_state} aiming for goals: {goals}")
+
+        waypoints = self.find_abstract_path()
+        if waypoints is None:
+            print(f"No path found to the goal. Expanded {self.expansions} abstract states.")
+            return None
+        path = [waypoints[0]]
+        for segment in self.refine(waypoints):
+            path.extend(segment)
+        print(f"Path of cost {self._path_cost(path)} found through {len(waypoints)} waypoints. "
+              f"Expanded {self.expansions} abstract states, rebuilt {self.rebuilt_clusters} clusters.")
+        return path
+
+    def find_abstract_path(self) -> Optional[list[State]]:
+        """
+        Return the waypoints of a path on the abstract graph, from the start to a goal, or None.
+        """
+        abstraction = self.abstraction
+        self.rebuilt_clusters = abstraction.update(self.environment.cost_table)
+        states = self.environment.map.states
+        start_state = states.canonical(self.environment.get_start())
+        goals = self.environment.get_goals()
+        self.expansions = 0
+        # No reachability check on the cells: after an edit it would cost a pass over the whole map,
+        # while an unreachable goal only exhausts the small abstract graph
+        start = start_state.id
+        goal_ids = {states.id_of(goal) for goal in goals}
+        if not goal_ids:
+            return None
+
+        # Connect the start and goals to the abstract graph
+        self._start_costs, self._start_parents = abstraction.local_search(start)
+        start_edges = {node: cost for node, cost in self._start_costs.items()
+                       if node in abstraction.node_index or node in goal_ids}
+        self._goal_parents: dict[int, dict[int, int]] = {}
+        goal_edges: dict[int, dict[int, float]] = {}
+        for goal in goal_ids:
+            costs, self._goal_parents[goal] = abstraction.local_search(goal, reverse=True)
+            for node, cost in costs.items():
+                if node in abstraction.node_index and node != goal:
+                    goal_edges.setdefault(node, {})[goal] = cost
+
+        def neighbors(id: int) -> Iterator[tuple[int, float]]:
+            if id == start:
+                yield from start_edges.items()
+            if id in abstraction.node_index:
+                yield from abstraction.neighbors(id)
+                yield from goal_edges.get(id, {}).items()
+
+        # A* on the abstract graph
+        queue = [(self.heuristic(start_state, goals), 0.0, start)]
+        costs = {start: 0.0}
+        parents: dict[int, Optional[int]] = {start: None}
+        while queue:
+            _, cost, id = heapq.heappop(queue)
+            if cost > costs[id]:  # Stale queue entry
+                continue
+            self.expansions += 1
+            if id in goal_ids:
+                waypoints = []
+                node: Optional[int] = id
+                while node is not None:
+                    waypoints.append(states[node])
+                    node = parents[node]
+                waypoints.reverse()
+                return waypoints
+            for neighbor, transition_cost in neighbors(id):
+                new_cost = cost + transition_cost
+                if new_cost < costs.get(neighbor, float("inf")):
+                    costs[neighbor] = new_cost
+                    parents[neighbor] = id
+                    heapq.heappush(queue, (new_cost + self.heuristic(states[neighbor], goals), new_cost, neighbor))
+        return None
+
+    def refine(self, waypoints: list[State]) -> Iterator[list[State]]:
+        """
+        Yield the cells between consecutive waypoints (without the first waypoint), segment by segment.
+
+        Segments are refined only when requested, e.g., an agent following the path may refine
+        just the next segment before each move.
+        """
+        states = self.environment.map.states
+        ids = [states.id_of(waypoint) for waypoint in waypoints]
+        for index, (source, target) in enumerate(zip(ids, ids[1:])):
+            if index == 0 and target in self._start_parents:
+                # From the start, the search connecting it to the abstract graph has the parents
+                cells = self._follow(self._start_parents, target, source)
+                cells.reverse()
+            elif target in self._goal_parents and source in self._goal_parents[target]:
+                cells = self._follow(self._goal_parents[target], source, target)[1:] + [target]
+            elif self.abstraction.cluster_of(source) != self.abstraction.cluster_of(target):
+                cells = [target]
+            else:
+                _, parents = self.abstraction.local_search(source, target)
+                cells = self._follow(parents, target, source)
+                cells.reverse()
+            yield [states[cell] for cell in cells]
+
+    def _follow(self, parents: dict[int, int], id: int, end: int) -> list[int]:
+        """
+        Return the cells from the given one along the parents up to the end cell (excluded).
+        """
+        cells = []
+        while id != end:
+            cells.append(id)
+            id = parents[id]
+        return cells
+
+    def _path_cost(self, path: list[State]) -> float:
+        cost_table = self.environment.cost_table
+        states = self.environment.map.states
+        return sum(cost_table.item(states.id_of(state)) for state in path[:-1])
+
+
+if __name__ == "__main__":
+    MAP = """
+    .S...
+    .###.
+    ...#G
+    """
+    env = SearchProblem(Map.from_string(MAP), graphics=False)
+    agent = HPAAgent(env, cluster_size=2)
+    path = agent.find_path()
+    print(f"Final path: {path}")
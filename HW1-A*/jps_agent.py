@@ -0,0 +1,180 @@
+from kuimaze2 import SearchProblem, Map, State, Action
+from typing import Optional
+
+from agent import Agent, create_frontier
+from heuristics import HeuristicFunction, create_heuristic, is_integral
+
+
+HORIZONTAL = (Action.RIGHT, Action.LEFT)
+VERTICAL = (Action.UP, Action.DOWN)
+
+
+class JPSAgent:
+    """
+    Jump Point Search for 4-connected maps with uniform costs.
+
+    Of all shortest paths, only the canonical ones are searched: horizontal moves first,
+    turning to vertical moves at any time, and turning back to horizontal moves only where
+    a wall forces it. Straight runs between such turning points (jump points) are scanned
+    without putting the intermediate states to the frontier. If the costs are not uniform
+    (e.g., there are DANGER states with their own cost), the plain A* Agent is used instead.
+    """
+
+    def __init__(self,
+                 environment: SearchProblem,
+                 heuristic: HeuristicFunction | str = "manhattan") -> None:
+        """
+        Create the agent; the heuristic is either a function or a name of a metric from heuristics.METRICS.
+
+        A metric counts steps, so it is scaled by the uniform cost of the map. A function shall estimate
+        costs, like any HeuristicFunction (e.g., `create_landmark_heuristic`), and is used unscaled.
+        """
+        self.environment = environment
+        self.heuristic = create_heuristic(heuristic) if isinstance(heuristic, str) else heuristic
+        self._counts_steps = isinstance(heuristic, str)
+        # Statistics of the last search
+        self.expansions = 0
+
+    def find_path(self) -> Optional[list[State]]:
+        cost = self.environment.get_uniform_cost()
+        if cost is None:
+            print("Costs are not uniform, falling back to A*.")
+            agent = Agent(self.environment, self.heuristic)
+            path = agent.find_path()
+            self.expansions = agent.expansions
+            return path
+
+        start_state = self.environment.get_start()
+        goals = self.environment.get_goals()
+        print(f"Starting Jump Point Search from {start_state} aiming for goals: {goals}")
+
+        self.expansions = 0
+        if self.environment.is_goal(start_state):
+            return [start_state]
+        if not self.environment.is_goal_reachable(start_state):
+            print("No path found to the goal: no goal is reachable from the start.")
+            return None
+
+        states = self.environment.map.states
+        self._prepare(goals)
+        start = start_state.id
+        heuristic = self.heuristic
+        if self._counts_steps:
+            heuristic = lambda state, goals: self.heuristic(state, goals) * cost
+        pq = create_frontier(self.environment, is_integral(self.heuristic))
+        pq.push((start_state, 0), heuristic(start_state, goals))
+        costs: dict[int, float] = {start: 0}
+        parents: dict[int, Optional[int]] = {start: None}
+        # The action by which each jump point was reached on its best known path
+        arrivals: dict[int, Optional[Action]] = {start: None}
+
+        while not pq.is_empty():
+            current_state, pushed_cost = pq.pop()
+            current = current_state.id
+            if pushed_cost > costs[current]:  # Stale frontier entry
+                continue
+            self.expansions += 1
+
+            if current in self._goal_ids:
+                path = self._reconstruct_path(parents, current)
+                print(f"Goal found! Path of cost {costs[current]}. Expanded {self.expansions} jump points.")
+                return path
+
+            for action in self._directions(current, arrivals[current]):
+                jump_point = self._jump(current, action)
+                if jump_point is None:
+                    continue
+                new_cost = costs[current] + self._distance(current, jump_point) * cost
+                if jump_point not in costs or new_cost < costs[jump_point]:
+                    costs[jump_point] = new_cost
+                    parents[jump_point] = current
+                    arrivals[jump_point] = action
+                    new_state = states[jump_point]
+                    pq.push((new_state, new_cost), new_cost + heuristic(new_state, goals))
+
+        print(f"No path found to the goal. Expanded {self.expansions} jump points.")
+        return None
+
+    def _prepare(self, goals: set[State]) -> None:
+        map = self.environment.map
+        self._width = map.width
+        self._borders = map.border_grid.ravel()
+        self._goal_ids = {goal.id for goal in goals}
+        self._steps = {action: action.delta()[0] * map.width + action.delta()[1] for action in Action}
+
+    def _can_move(self, id: int, action: Action) -> bool:
+        return not (self._borders.item(id) >> action) & 1
+
+    def _is_forced(self, id: int, arrival: Action, side: Action) -> bool:
+        """
+        Return True if, after a vertical move, a wall forces the turn to the side at this state.
+        """
+        return self._can_move(id, side) and not self._can_move(id - self._steps[arrival], side)
+
+    def _directions(self, id: int, arrival: Optional[Action]) -> list[Action]:
+        if arrival is None:
+            return list(Action)
+        if arrival in HORIZONTAL:
+            return [arrival, *VERTICAL]
+        return [arrival, *(side for side in HORIZONTAL if self._is_forced(id, arrival, side))]
+
+    def _jump(self, id: int, action: Action) -> Optional[int]:
+        if action in HORIZONTAL:
+            return self._jump_horizontal(id, action)
+        return self._jump_vertical(id, action)
+
+    def _jump_vertical(self, id: int, action: Action) -> Optional[int]:
+        step = self._steps[action]
+        while self._can_move(id, action):
+            id += step
+            if id in self._goal_ids:
+                return id
+            for side in HORIZONTAL:
+                if self._is_forced(id, action, side):
+                    return id
+        return None
+
+    def _jump_horizontal(self, id: int, action: Action) -> Optional[int]:
+        step = self._steps[action]
+        while self._can_move(id, action):
+            id += step
+            if id in self._goal_ids:
+                return id
+            # Turning vertical is always allowed; stop here if it leads anywhere
+            if self._jump_vertical(id, Action.UP) is not None or self._jump_vertical(id, Action.DOWN) is not None:
+                return id
+        return None
+
+    def _distance(self, id1: int, id2: int) -> int:
+        r1, c1 = divmod(id1, self._width)
+        r2, c2 = divmod(id2, self._width)
+        return abs(r1 - r2) + abs(c1 - c2)
+
+    def _reconstruct_path(self, parents: dict[int, Optional[int]], goal: int) -> list[State]:
+        """
+        Return the full path through the jump points, including the states between them.
+        """
+        jump_points = []
+        id: Optional[int] = goal
+        while id is not None:
+            jump_points.append(id)
+            id = parents[id]
+        jump_points.reverse()
+        states = self.environment.map.states
+        path = [states[jump_points[0]]]
+        for id1, id2 in zip(jump_points, jump_points[1:]):
+            step = (id2 - id1) // self._distance(id1, id2)
+            path.extend(states[id] for id in range(id1 + step, id2 + step, step))
+        return path
+
+
+if __name__ == "__main__":
+    MAP = """
+    .S...
+    .###.
+    ...#G
+    """
+    env = SearchProblem(Map.from_string(MAP), graphics=False)
+    agent = JPSAgent(env)
+    path = agent.find_path()
+    print(f"Final path: {path}")
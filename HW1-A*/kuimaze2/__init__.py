@@ -3,7 +3,7 @@ Maze environments for search problems, MDP problems, and RL problems.
 Educational package used in Cybernetics and AI course at Czech Technical University in Prague.
 """
 
-from kuimaze2.map import State, Action, Map
+from kuimaze2.map import State, Action, Map, GridMap
 from kuimaze2.search import SearchProblem
 from kuimaze2.mdp import MDPProblem, StochasticActions
 from kuimaze2.rl import RLProblem
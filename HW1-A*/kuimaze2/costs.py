@@ -0,0 +1,15 @@
+"""
+Properties of cost tables (see `SearchProblem.cost_table`) shared by the solvers.
+"""
+
+import numpy as np
+
+
+FLOAT32_EXACT_LIMIT = 2**24
+"""Largest integer up to which all integers are exactly representable in float32."""
+
+
+def is_integral_cost_table(costs: np.ndarray) -> bool:
+    """Return True if all finite costs are integers; infinite costs (walls, unreachable states) are ignored."""
+    finite = costs[np.isfinite(costs)]
+    return bool(np.all(finite == np.floor(finite)))
@@ -0,0 +1,204 @@
+"""
+Goal distance fields: exact costs-to-go from all states, for answering repeated path queries.
+"""
+
+import heapq
+import weakref
+from typing import Optional
+
+import numpy as np
+
+from kuimaze2.costs import is_integral_cost_table
+from kuimaze2.map import Action, Map, Role, ROLE_CODE, State
+from kuimaze2.wavefront import UNREACHED, compute_uniform_cost, wavefront
+
+
+NO_ACTION = -1
+"""Next action stored for goals and for states from which no goal is reachable."""
+
+
+def compute_distance_field(map: Map, cost_table: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Run Dijkstra's algorithm backwards from all goals of the map.
+
+    Return the cost-to-go of all states (float64, infinity if no goal is reachable)
+    and the first action of an optimal path from each state (int8, `NO_ACTION` if there is none),
+    both indexed by state ids. If all transitions cost the same, the vectorized `wavefront` is used
+    instead, and a vectorized bucket variant if all costs are integers.
+    """
+    goals = np.flatnonzero(map.role_grid.ravel() == ROLE_CODE[Role.GOAL])
+    return compute_distances_to(map, cost_table, goals)
+
+
+def compute_distances_to(map: Map, cost_table: np.ndarray, targets: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Same as `compute_distance_field`, for paths to the given target state ids instead of the goals.
+
+    Paths may pass through goals other than the targets. If all transitions from free non-goal
+    states cost the same, transitions from goals count with that cost too (see `wavefront`).
+    """
+    uniform_cost = compute_uniform_cost(map.role_grid, cost_table)
+    if uniform_cost is not None:
+        return compute_uniform_distances_to(map, uniform_cost, targets)
+    return compute_distances_over(map.predecessor_table, cost_table, targets)
+
+
+def compute_distances_over(
+    predecessor_table: np.ndarray, cost_table: np.ndarray, targets: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Same as `compute_distances_to`, over the transitions of the given predecessor table.
+
+    The table may be a restricted copy of `Map.predecessor_table` (e.g., without transitions
+    between some states); no wavefront shortcut is taken.
+    """
+    if is_integral_cost_table(cost_table):
+        return compute_integral_distances_over(predecessor_table, cost_table, targets)
+    n = len(predecessor_table)
+    distances = np.full(n, np.inf)
+    next_actions = np.full(n, NO_ACTION, dtype=np.int8)
+    targets = np.asarray(targets).tolist()
+    distances[targets] = 0
+    queue = [(0.0, target) for target in targets]
+    heapq.heapify(queue)
+    while queue:
+        distance, id = heapq.heappop(queue)
+        if distance > distances.item(id):
+            continue
+        for action, predecessor in enumerate(predecessor_table[id].tolist()):
+            if predecessor < 0:
+                continue
+            new_distance = distance + cost_table.item(predecessor)
+            if new_distance < distances.item(predecessor):
+                distances[predecessor] = new_distance
+                next_actions[predecessor] = action
+                heapq.heappush(queue, (new_distance, predecessor))
+    return distances, next_actions
+
+
+def compute_integral_distances_over(
+    predecessor_table: np.ndarray, cost_table: np.ndarray, targets: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Same as `compute_distances_over` for integral costs, vectorized over all states of equal distance.
+
+    Dijkstra's algorithm with buckets (Dial's algorithm): all open states with the lowest distance
+    are settled at once with NumPy operations, so the Python overhead is per distinct distance.
+    """
+    n = len(predecessor_table)
+    distances = np.full(n, np.inf)
+    next_actions = np.full(n, NO_ACTION, dtype=np.int8)
+    open_ids = np.unique(np.asarray(targets, dtype=np.int64))
+    distances[open_ids] = 0
+    actions = np.arange(predecessor_table.shape[1], dtype=np.int8)
+    # Scratch array for removing duplicate ids without sorting
+    positions = np.empty(n, dtype=np.int64)
+    while len(open_ids):
+        # Open ids may repeat or be outdated; all of them with the lowest distance are settled now
+        open_distances = distances[open_ids]
+        bucket = open_distances.min()
+        settled = open_distances == bucket
+        frontier = _unique_ids(open_ids[settled], positions)
+        open_ids = open_ids[~settled]
+        predecessors = predecessor_table[frontier].ravel()
+        valid = predecessors >= 0
+        predecessor_actions = np.tile(actions, len(frontier))[valid]
+        predecessors = predecessors[valid]
+        candidates = bucket + cost_table[predecessors]
+        better = candidates < distances[predecessors]
+        predecessors, candidates = predecessors[better], candidates[better]
+        predecessor_actions = predecessor_actions[better]
+        # Of several candidates for a predecessor, keep the lowest one
+        np.minimum.at(distances, predecessors, candidates)
+        lowest = candidates == distances[predecessors]
+        predecessors, predecessor_actions = predecessors[lowest], predecessor_actions[lowest]
+        next_actions[predecessors] = predecessor_actions
+        open_ids = np.concatenate([open_ids, _unique_ids(predecessors, positions)])
+    return distances, next_actions
+
+
+def _unique_ids(ids: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """Return the ids without duplicates, using a scratch array indexed by ids."""
+    indices = np.arange(len(ids))
+    positions[ids] = indices
+    return ids[positions[ids] == indices]
+
+
+def compute_uniform_distances_to(map: Map, cost: float, targets: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Same as `compute_distances_to` for maps where leaving any free non-goal state has the given cost."""
+    steps, directions = wavefront(map, targets, reverse=True)
+    steps, directions = steps.ravel(), directions.ravel()
+    distances = steps * cost
+    distances[steps == UNREACHED] = np.inf
+    return distances, directions
+
+
+class DistanceField:
+    """Exact cost-to-go to the nearest goal and the next optimal action for every state of a map.
+
+    The field is valid for the map version and costs it was computed for (see `is_valid_for`).
+    It answers path queries from any start in O(path length), and, being callable like a heuristic,
+    it can serve as a perfect heuristic for A*.
+    """
+
+    def __init__(self, map: Map, cost_table: np.ndarray):
+        # Only a weak reference, so that cached fields do not keep their maps alive
+        self._map = weakref.ref(map)
+        self.version = map.version
+        self.distances, self.next_actions = compute_distance_field(map, cost_table)
+        self.integral = is_integral_cost_table(cost_table)
+
+    @property
+    def map(self) -> Map:
+        map = self._map()
+        if map is None:
+            raise ReferenceError("DistanceField: The map of the field does not exist anymore")
+        return map
+
+    def is_valid_for(self, map: Map) -> bool:
+        """Return True if the field was computed for the current version of the map."""
+        return map is self._map() and map.version == self.version
+
+    def cost_to_go(self, state: State) -> float:
+        """Return the cost of an optimal path from the state to the nearest goal, infinity if there is none."""
+        if not self.map.contains(state):
+            return float("inf")
+        return self.distances.item(self.map.states.id_of(state))
+
+    def next_action(self, state: State) -> Optional[Action]:
+        """Return the first action of an optimal path from the state, None for goals and dead ends."""
+        if not self.map.contains(state):
+            return None
+        action = self.next_actions.item(self.map.states.id_of(state))
+        return None if action == NO_ACTION else Action(action)
+
+    def path_from(self, state: State) -> Optional[list[State]]:
+        """Return an optimal path from the state to the nearest goal by following the field, or None."""
+        if self.cost_to_go(state) == float("inf"):
+            return None
+        states = self.map.states
+        successor_table = self.map.successor_table
+        id = states.id_of(state)
+        path = [states[id]]
+        while (action := self.next_actions.item(id)) != NO_ACTION:
+            id = successor_table.item(id, action)
+            path.append(states[id])
+        return path
+
+    def __call__(self, state: State, goals: set[State]) -> float:
+        """Use the field as a heuristic (the goals must be the goals of the map)."""
+        return self.cost_to_go(state)
+
+
+_cache: "weakref.WeakKeyDictionary[Map, dict[tuple, DistanceField]]" = weakref.WeakKeyDictionary()
+
+
+def get_distance_field(map: Map, cost_table: np.ndarray, costs_key: tuple) -> DistanceField:
+    """Return the distance field of the map for the given costs, computed only once per map version.
+
+    `costs_key` identifies the cost table; fields of older map versions are discarded.
+    """
+    fields = _cache.setdefault(map, {})
+    field = fields.get(costs_key)
+    if field is None or not field.is_valid_for(map):
+        if field is not None:
+            # The map was edited: all fields of the previous version are stale
+            fields.clear()
+        field = fields[costs_key] = DistanceField(map, cost_table)
+    return field
@@ -0,0 +1,214 @@
+"""
+Seeded procedural generator of maze maps and a shared benchmark corpus.
+
+All generators are vectorized (or loop only over rooms), so they can produce maps
+from 10x10 up to 10^7 cells. Maps use the usual `Role` alphabet and are returned as GridMaps.
+Usage from the command line, to write the benchmark corpus:
+
+    python -m kuimaze2.generator benchmarks/ --max-cells 1000000
+"""
+
+import argparse
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from kuimaze2.map import GridMap, Role, ROLE_CODE, compute_border_grid, compute_component_grid
+
+
+EMPTY = ROLE_CODE[Role.EMPTY]
+WALL = ROLE_CODE[Role.WALL]
+
+
+def perfect_maze_grid(height: int, width: int, rng: np.random.Generator) -> np.ndarray:
+    """Return a role grid of a perfect maze (exactly one path between any two free cells).
+
+    Maze cells lie on odd coordinates, separated by walls; the maze is carved by
+    the sidewinder algorithm, vectorized over all rows at once.
+    """
+    grid = np.full((height, width), WALL, dtype=np.uint8)
+    rows, cols = (height - 1) // 2, (width - 1) // 2
+    if rows < 1 or cols < 1:
+        raise ValueError(f"Generator: Perfect maze needs at least 3x3 cells, got {height}x{width}")
+    grid[1 : 2 * rows : 2, 1 : 2 * cols : 2] = EMPTY
+    # The first row is a single corridor
+    grid[1, 2 : 2 * cols - 1 : 2] = EMPTY
+    if rows == 1:
+        return grid
+    # Other rows: carve east at random, close the run otherwise and at the row end
+    east = rng.random((rows - 1, cols - 1), dtype=np.float32) < 0.5
+    grid[3 : 2 * rows : 2, 2 : 2 * cols - 1 : 2][east] = EMPTY
+    closes = np.ones((rows - 1, cols), dtype=bool)
+    closes[:, :-1] = ~east
+    run_ends = np.flatnonzero(closes)
+    run_starts = np.concatenate([[0], run_ends[:-1] + 1])
+    # Each run is connected north through one of its cells chosen at random
+    chosen = run_starts + (rng.random(len(run_ends)) * (run_ends - run_starts + 1)).astype(np.int64)
+    chosen_rows, chosen_cols = np.divmod(chosen, cols)
+    grid[2 * chosen_rows + 2, 2 * chosen_cols + 1] = EMPTY
+    return grid
+
+
+def rooms_and_corridors_grid(
+    height: int,
+    width: int,
+    rng: np.random.Generator,
+    n_rooms: int | None = None,
+    room_size: tuple[int, int] = (3, 12),
+) -> np.ndarray:
+    """Return a role grid of rectangular rooms connected by L-shaped corridors.
+
+    If `n_rooms` is not given, there is one room per 400 cells on average.
+    Consecutive rooms are connected, so all rooms form a single connected area.
+    """
+    grid = np.full((height, width), WALL, dtype=np.uint8)
+    n_rooms = n_rooms or max(2, height * width // 400)
+    min_size, max_size = room_size
+    room_heights = rng.integers(min_size, max_size + 1, n_rooms).clip(max=height - 2)
+    room_widths = rng.integers(min_size, max_size + 1, n_rooms).clip(max=width - 2)
+    tops = (rng.random(n_rooms) * (height - 1 - room_heights)).astype(np.int64) + 1
+    lefts = (rng.random(n_rooms) * (width - 1 - room_widths)).astype(np.int64) + 1
+    centers_r = tops + room_heights // 2
+    centers_c = lefts + room_widths // 2
+    for top, left, room_height, room_width in zip(tops, lefts, room_heights, room_widths):
+        grid[top : top + room_height, left : left + room_width] = EMPTY
+    for i in range(n_rooms - 1):
+        (r1, c1), (r2, c2) = (centers_r[i], centers_c[i]), (centers_r[i + 1], centers_c[i + 1])
+        grid[r1, min(c1, c2) : max(c1, c2) + 1] = EMPTY
+        grid[min(r1, r2) : max(r1, r2) + 1, c2] = EMPTY
+    return grid
+
+
+def random_obstacles_grid(height: int, width: int, rng: np.random.Generator, density: float = 0.3) -> np.ndarray:
+    """Return a role grid with walls placed independently with the given density."""
+    walls = rng.random((height, width), dtype=np.float32) < density
+    return np.where(walls, np.uint8(WALL), np.uint8(EMPTY))
+
+
+def sprinkle_dangers(role_grid: np.ndarray, rng: np.random.Generator, density: float) -> None:
+    """Turn empty cells of the role grid into danger cells with the given density, in place."""
+    if density <= 0:
+        return
+    dangers = (role_grid == EMPTY) & (rng.random(role_grid.shape, dtype=np.float32) < density)
+    role_grid[dangers] = ROLE_CODE[Role.DANGER]
+
+
+def place_start_and_goals(
+    role_grid: np.ndarray, border_grid: np.ndarray, rng: np.random.Generator, n_goals: int = 1
+) -> None:
+    """Place the start and goals to distinct empty cells of the largest connected area, in place.
+
+    This way, every goal is reachable from the start.
+    """
+    components = compute_component_grid(role_grid, border_grid).ravel()
+    if components.max() < 0:
+        raise ValueError("Generator: The map has no free cells for the start and goals.")
+    largest = np.bincount(components[components >= 0]).argmax()
+    candidates = np.flatnonzero((components == largest) & (role_grid.ravel() == EMPTY))
+    if len(candidates) < 1 + n_goals:
+        raise ValueError(f"Generator: Not enough empty cells for the start and {n_goals} goal(s).")
+    chosen = rng.choice(candidates, size=1 + n_goals, replace=False)
+    role_grid.ravel()[chosen[0]] = ROLE_CODE[Role.START]
+    role_grid.ravel()[chosen[1:]] = ROLE_CODE[Role.GOAL]
+
+
+GENERATORS = {
+    "perfect": perfect_maze_grid,
+    "rooms": rooms_and_corridors_grid,
+    "obstacles": random_obstacles_grid,
+}
+"""Available kinds of generated maps and their role grid generators."""
+
+
+def generate_map(
+    kind: str,
+    height: int,
+    width: int,
+    seed: int | None = None,
+    danger_density: float = 0.0,
+    n_goals: int = 1,
+    **kwargs,
+) -> GridMap:
+    """Generate a map of the given kind (see `GENERATORS`) with a start and goals.
+
+    The same seed always gives the same map. Other keyword arguments are passed
+    to the role grid generator, e.g., `density` for the "obstacles" kind.
+    """
+    if kind not in GENERATORS:
+        raise ValueError(f"Generator: Unknown kind of map {kind!r}, choose one of {list(GENERATORS)}")
+    rng = np.random.default_rng(seed)
+    role_grid = GENERATORS[kind](height, width, rng, **kwargs)
+    sprinkle_dangers(role_grid, rng, danger_density)
+    # Roles of start, goals, and dangers do not affect borders
+    border_grid = compute_border_grid(role_grid)
+    place_start_and_goals(role_grid, border_grid, rng, n_goals)
+    return GridMap(role_grid, border_grid)
+
+
+@dataclass(frozen=True)
+class MazeSpec:
+    """Specification of a generated map, see `generate_map`."""
+
+    name: str
+    kind: str
+    height: int
+    width: int
+    seed: int
+    danger_density: float = 0.0
+    n_goals: int = 1
+    density: float | None = None
+
+    @property
+    def cells(self) -> int:
+        return self.height * self.width
+
+    def generate(self) -> GridMap:
+        kwargs = {} if self.density is None else {"density": self.density}
+        return generate_map(
+            self.kind, self.height, self.width, self.seed, self.danger_density, self.n_goals, **kwargs
+        )
+
+
+BENCHMARK_CORPUS: tuple[MazeSpec, ...] = (
+    MazeSpec("perfect-11x11", "perfect", 11, 11, seed=1),
+    MazeSpec("perfect-101x101", "perfect", 101, 101, seed=2),
+    MazeSpec("perfect-1001x1001", "perfect", 1001, 1001, seed=3),
+    MazeSpec("perfect-3163x3163", "perfect", 3163, 3163, seed=4),
+    MazeSpec("rooms-100x100", "rooms", 100, 100, seed=5),
+    MazeSpec("rooms-1000x1000-dangers", "rooms", 1000, 1000, seed=6, danger_density=0.05),
+    MazeSpec("rooms-3162x3162", "rooms", 3162, 3162, seed=7),
+    MazeSpec("obstacles-10x10", "obstacles", 10, 10, seed=8, density=0.2),
+    MazeSpec("obstacles-1000x1000-dangers", "obstacles", 1000, 1000, seed=9, danger_density=0.05, density=0.3),
+    MazeSpec("obstacles-3162x3162", "obstacles", 3162, 3162, seed=10, density=0.3),
+    MazeSpec("open-2000x2000", "obstacles", 2000, 2000, seed=11, density=0.05),
+    MazeSpec("open-2000x2000-multigoal", "obstacles", 2000, 2000, seed=12, density=0.05, n_goals=100),
+)
+"""Fixed benchmark corpus shared by all solver benchmarks, from 10^2 to 10^7 cells."""
+
+
+def write_benchmark_corpus(directory: os.PathLike, max_cells: int | None = None) -> list[Path]:
+    """Generate the benchmark corpus into the directory as binary maps (see `Map.save_binary`).
+
+    Maps with more than `max_cells` cells are skipped. Return the paths of the written maps.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for spec in BENCHMARK_CORPUS:
+        if max_cells is not None and spec.cells > max_cells:
+            continue
+        path = directory / f"{spec.name}.npy"
+        spec.generate().save_binary(path)
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write the benchmark corpus of generated maps.")
+    parser.add_argument("directory", type=Path, help="output directory")
+    parser.add_argument("--max-cells", type=int, default=None, help="skip maps with more cells")
+    args = parser.parse_args()
+    for path in write_benchmark_corpus(args.directory, args.max_cells):
+        print(path)
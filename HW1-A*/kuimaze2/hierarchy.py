@@ -0,0 +1,261 @@
+"""
+Cluster abstraction of a map for hierarchical pathfinding (HPA*).
+
+The map is split into square clusters. Where two neighboring clusters are connected
+along their common border, a few pairs of adjacent cells become entrances; their cells
+are the nodes of a small abstract graph. Nodes of a cluster are connected by the exact
+costs of paths inside the cluster, nodes of an entrance by the single transition between them.
+A path query is answered on the abstract graph first and only then refined to cells
+(see `hpa_agent.HPAAgent`). After the map is edited, only the affected clusters are rebuilt.
+"""
+
+import heapq
+from typing import Iterator, Optional
+
+import numpy as np
+
+from kuimaze2.distance_field import compute_distances_over
+from kuimaze2.map import Action, Map, Role, ROLE_CODE
+
+
+MIN_SPLIT_ENTRANCE = 6
+"""Entrances at least this wide get two transitions (at both ends), narrower ones a single one in the middle."""
+
+BorderKey = tuple[int, bool]
+"""Key of the border between two clusters: the cluster above or to the left, and True for a vertical border."""
+
+
+class ClusterAbstraction:
+    """Clusters of a map, their entrances, and the costs of paths inside the clusters.
+
+    The abstraction follows edits of a GridMap: call `update` (done by HPAAgent before each query)
+    to rebuild the clusters whose cells changed since the last build, together with their neighbors,
+    whose entrances may have changed as well. Costs are those of a SearchProblem (`cost_table`),
+    paths inside clusters do not pass through goals.
+    """
+
+    def __init__(self, map: Map, cost_table: np.ndarray, cluster_size: int = 16):
+        if cluster_size < 2:
+            raise ValueError(f"ClusterAbstraction: Cluster size must be at least 2, got {cluster_size}")
+        self.map = map
+        self.cluster_size = cluster_size
+        self.cluster_rows = -(-map.height // cluster_size)
+        self.cluster_cols = -(-map.width // cluster_size)
+        self.build(cost_table)
+
+    @property
+    def number_of_nodes(self) -> int:
+        return len(self.node_index)
+
+    def build(self, cost_table: np.ndarray) -> None:
+        """Build the whole abstraction from scratch."""
+        self.version = self.map.version
+        self.cost_table = cost_table
+        self.restricted_table = self._restrict(self.map.predecessor_table.copy(), np.arange(len(cost_table)))
+        # Transitions chosen on each border, as (cell in the first cluster, cell in the second) pairs
+        self.borders: dict[BorderKey, list[tuple[int, int]]] = {}
+        for key in self._all_borders():
+            self.borders[key] = self._find_transitions(key)
+        # Nodes of each cluster and the costs of paths between them: costs[i, j] from nodes[i] to nodes[j]
+        self.clusters: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+        self.node_index: dict[int, tuple[int, int]] = {}  # Node id -> (cluster, index in the cluster)
+        self.partners: dict[int, list[int]] = {}  # Node id -> nodes across the borders
+        self._build_clusters(range(self.cluster_rows * self.cluster_cols))
+
+    def update(self, cost_table: np.ndarray) -> int:
+        """Rebuild the clusters changed since the last build; return the number of rebuilt clusters."""
+        if self.version == self.map.version:
+            return 0
+        changed = self.map.changed_ids_since(self.version)
+        if changed is None:
+            self.build(cost_table)
+            return self.cluster_rows * self.cluster_cols
+        self.version = self.map.version
+        self.cost_table = cost_table
+        changed_clusters = set(self.cluster_of(changed).tolist())
+        for cluster in changed_clusters:
+            cells = self.cells_of(cluster)
+            self.restricted_table[cells] = self._restrict(self.map.predecessor_table[cells], cells)
+        affected = set(changed_clusters)
+        for cluster in changed_clusters:
+            for key in self._borders_of(cluster):
+                self.borders[key] = self._find_transitions(key)
+                affected.update(self._clusters_of_border(key))
+        self._build_clusters(sorted(affected))
+        return len(affected)
+
+    def cluster_of(self, ids: np.ndarray | int) -> np.ndarray | int:
+        width, size = self.map.width, self.cluster_size
+        return ids // width // size * self.cluster_cols + ids % width // size
+
+    def cells_of(self, cluster: int) -> np.ndarray:
+        """Return ids of all cells of the cluster."""
+        top, left = divmod(cluster, self.cluster_cols)
+        top, left = top * self.cluster_size, left * self.cluster_size
+        rows = np.arange(top, min(top + self.cluster_size, self.map.height))
+        cols = np.arange(left, min(left + self.cluster_size, self.map.width))
+        return (rows[:, None] * self.map.width + cols).ravel()
+
+    def neighbors(self, node: int) -> Iterator[tuple[int, float]]:
+        """Yield the (node, cost) pairs of the abstract transitions from the node."""
+        cluster, index = self.node_index[node]
+        nodes, costs = self.clusters[cluster]
+        for other, cost in zip(nodes.tolist(), costs[index].tolist()):
+            if other != node and cost < np.inf:
+                yield other, cost
+        cost = self.cost_table.item(node)
+        successors = self.map.successor_table[node].tolist()
+        for partner in self.partners.get(node, ()):
+            if partner in successors:
+                yield partner, cost
+
+    def local_search(
+        self, source: int, target: Optional[int] = None, reverse: bool = False
+    ) -> tuple[dict[int, float], dict[int, int]]:
+        """Run Dijkstra's algorithm from the source inside its cluster, stopping at the target if given.
+
+        Return the costs of the reached cells and their parents. Forwards, the costs are
+        from the source and the parents point back to it; in reverse, the costs are to the source
+        and the parents point to the next cell towards it. Goals other than the source are
+        reached but not passed through.
+        """
+        cluster = self.cluster_of(source)
+        table = self.map.predecessor_table if reverse else self.map.successor_table
+        roles = self.map.role_grid.ravel()
+        goal = ROLE_CODE[Role.GOAL]
+        costs = {source: 0.0}
+        parents: dict[int, int] = {}
+        queue = [(0.0, source)]
+        while queue:
+            cost, id = heapq.heappop(queue)
+            if cost > costs[id]:
+                continue
+            if id == target:
+                break
+            if id != source and roles.item(id) == goal and not reverse:
+                continue
+            for neighbor in table[id].tolist():
+                if neighbor < 0 or neighbor == id or self.cluster_of(neighbor) != cluster:
+                    continue
+                if reverse:
+                    if roles.item(neighbor) == goal:
+                        continue
+                    new_cost = cost + self.cost_table.item(neighbor)
+                else:
+                    new_cost = cost + self.cost_table.item(id)
+                if new_cost < costs.get(neighbor, np.inf):
+                    costs[neighbor] = new_cost
+                    parents[neighbor] = id
+                    heapq.heappush(queue, (new_cost, neighbor))
+        return costs, parents
+
+    def _restrict(self, predecessors: np.ndarray, cells: np.ndarray) -> np.ndarray:
+        """Remove transitions between clusters and through goals from rows of the predecessor table."""
+        inside = predecessors >= 0
+        inside[inside] = self.cluster_of(predecessors[inside]) == np.repeat(self.cluster_of(cells), 4)[inside.ravel()]
+        predecessors[~inside] = -1
+        # Paths inside clusters end at goals instead of passing through them
+        predecessors[self.map.role_grid.ravel()[cells] == ROLE_CODE[Role.GOAL]] = -1
+        return predecessors
+
+    def _all_borders(self) -> Iterator[BorderKey]:
+        for cluster in range(self.cluster_rows * self.cluster_cols):
+            row, col = divmod(cluster, self.cluster_cols)
+            if col + 1 < self.cluster_cols:
+                yield (cluster, True)
+            if row + 1 < self.cluster_rows:
+                yield (cluster, False)
+
+    def _borders_of(self, cluster: int) -> list[BorderKey]:
+        row, col = divmod(cluster, self.cluster_cols)
+        keys = []
+        if col + 1 < self.cluster_cols:
+            keys.append((cluster, True))
+        if col > 0:
+            keys.append((cluster - 1, True))
+        if row + 1 < self.cluster_rows:
+            keys.append((cluster, False))
+        if row > 0:
+            keys.append((cluster - self.cluster_cols, False))
+        return keys
+
+    def _clusters_of_border(self, key: BorderKey) -> tuple[int, int]:
+        cluster, vertical = key
+        return cluster, cluster + (1 if vertical else self.cluster_cols)
+
+    def _find_transitions(self, key: BorderKey) -> list[tuple[int, int]]:
+        """Find the entrances on the border and return the pairs of cells of their transitions."""
+        cluster, vertical = key
+        width, size = self.map.width, self.cluster_size
+        top, left = divmod(cluster, self.cluster_cols)
+        top, left = top * size, left * size
+        if vertical:
+            rows = np.arange(top, min(top + size, self.map.height))
+            firsts = rows * width + left + size - 1
+            seconds = firsts + 1
+            forward, backward = Action.RIGHT, Action.LEFT
+        else:
+            cols = np.arange(left, min(left + size, width))
+            firsts = (top + size - 1) * width + cols
+            seconds = firsts + width
+            forward, backward = Action.DOWN, Action.UP
+        successor_table = self.map.successor_table
+        open = (successor_table[firsts, forward] == seconds) | (successor_table[seconds, backward] == firsts)
+        # Entrances are maximal runs of open pairs of cells along the border
+        edges = np.diff(np.concatenate([[0], open.astype(np.int8), [0]]))
+        starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1
+        transitions = []
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            chosen = (start, end) if end - start + 1 >= MIN_SPLIT_ENTRANCE else ((start + end) // 2,)
+            transitions.extend((firsts.item(i), seconds.item(i)) for i in chosen)
+        return transitions
+
+    def _build_clusters(self, clusters: Iterator[int] | list[int]) -> None:
+        """Collect the nodes of the clusters and compute the costs of paths between them."""
+        clusters = list(clusters)
+        if not clusters:
+            return
+        nodes_of: dict[int, set[int]] = {cluster: set() for cluster in clusters}
+        for cluster in clusters:
+            for key in self._borders_of(cluster):
+                first_cluster = self._clusters_of_border(key)[0]
+                for first, second in self.borders[key]:
+                    nodes_of[cluster].add(first if cluster == first_cluster else second)
+        for cluster in clusters:
+            old = self.clusters.get(cluster)
+            if old is not None:
+                for node in old[0].tolist():
+                    self.node_index.pop(node, None)
+                    self.partners.pop(node, None)
+            nodes = np.array(sorted(nodes_of[cluster]), dtype=np.int64)
+            self.clusters[cluster] = (nodes, np.full((len(nodes), len(nodes)), np.inf))
+            for index, node in enumerate(nodes.tolist()):
+                self.node_index[node] = (cluster, index)
+        # Partners of the nodes of rebuilt clusters, from all their borders
+        for cluster in clusters:
+            for key in self._borders_of(cluster):
+                for first, second in self.borders[key]:
+                    for node, partner in ((first, second), (second, first)):
+                        if self.node_index.get(node, (None,))[0] == cluster:
+                            partners = self.partners.setdefault(node, [])
+                            if partner not in partners:
+                                partners.append(partner)
+        # The costs of paths to the k-th nodes of all clusters are found by a single search,
+        # since the searches cannot leave the clusters. The searches run over the cells
+        # of the rebuilt clusters only, renumbered from 0, so that their cost does not grow with the map.
+        if len(clusters) == self.cluster_rows * self.cluster_cols:
+            cells = np.arange(len(self.cost_table))
+            table, costs = self.restricted_table, self.cost_table
+        else:
+            cells = np.sort(np.concatenate([self.cells_of(cluster) for cluster in clusters]))
+            table = self.restricted_table[cells]
+            inside = table >= 0
+            table[inside] = np.searchsorted(cells, table[inside])
+            costs = self.cost_table[cells]
+        nodes_per_cluster = [np.searchsorted(cells, self.clusters[cluster][0]) for cluster in clusters]
+        for k in range(max((len(nodes) for nodes in nodes_per_cluster), default=0)):
+            targets = np.array([nodes[k] for nodes in nodes_per_cluster if len(nodes) > k], dtype=np.int64)
+            distances, _ = compute_distances_over(table, costs, targets)
+            for cluster, nodes in zip(clusters, nodes_per_cluster):
+                if len(nodes) > k:
+                    self.clusters[cluster][1][:, k] = distances[nodes]
@@ -0,0 +1,140 @@
+"""
+Landmark distance tables for the ALT heuristic (A*, landmarks, triangle inequality).
+
+For a landmark L, the cost from any state s to a goal t is at least cost(s, L) - cost(t, L).
+The tables hold the exact costs from all states to a few landmarks, chosen far apart
+by farthest-point selection, and are stored compactly (uint16 if possible). They depend
+only on the map and the costs, so they can be saved next to the map file and reused:
+
+    tables = LandmarkTables.for_map_file("maps/rooms.npy", problem.map, problem.cost_table)
+"""
+
+import os
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Self
+
+import numpy as np
+
+from kuimaze2.costs import FLOAT32_EXACT_LIMIT, is_integral_cost_table
+from kuimaze2.distance_field import compute_distances_to
+from kuimaze2.map import Map, Role, ROLE_CODE
+
+
+LANDMARKS_SUFFIX = ".landmarks.npz"
+"""Suffix replacing the suffix of a map file for the file of its landmark tables."""
+
+UINT16_UNREACHABLE = np.iinfo(np.uint16).max
+"""Value of unreachable landmarks in uint16 tables."""
+
+def map_fingerprint(map: Map, cost_table: np.ndarray) -> int:
+    """Return a checksum of the map grids and costs, to tell if saved tables belong to them."""
+    checksum = zlib.crc32(np.ascontiguousarray(map.role_grid).tobytes())
+    checksum = zlib.crc32(np.ascontiguousarray(map.border_grid).tobytes(), checksum)
+    return zlib.crc32(np.ascontiguousarray(cost_table, dtype=np.float64).tobytes(), checksum)
+
+
+def select_landmarks(
+    map: Map, cost_table: np.ndarray, count: int, first: int | None = None
+) -> tuple[np.ndarray, list[np.ndarray]]:
+    """Choose up to `count` landmarks by farthest-point selection.
+
+    The first landmark is the state farthest from `first` (by default the start, or the first free cell),
+    each next one is the state farthest from all landmarks chosen so far, among the states
+    from which some landmark is reachable. Return the landmark ids and their tables of costs
+    from all states (float64, infinity if the landmark is not reachable).
+    """
+    roles = map.role_grid.ravel()
+    if first is None:
+        starts = np.flatnonzero(roles == ROLE_CODE[Role.START])
+        free = np.flatnonzero(roles != ROLE_CODE[Role.WALL])
+        if len(free) == 0:
+            raise ValueError("Landmarks: The map has no free cells.")
+        first = starts[0] if len(starts) else free[0]
+    farthest, _ = compute_distances_to(map, cost_table, np.array([first]))
+    landmarks: list[int] = []
+    tables: list[np.ndarray] = []
+    while len(landmarks) < count:
+        reachable = np.isfinite(farthest)
+        if not reachable.any():
+            break
+        candidate = int(np.flatnonzero(reachable)[farthest[reachable].argmax()])
+        if landmarks and farthest[candidate] == 0:
+            break  # All reachable states are landmarks already
+        table, _ = compute_distances_to(map, cost_table, np.array([candidate]))
+        landmarks.append(candidate)
+        tables.append(table)
+        farthest = table if len(landmarks) == 1 else np.minimum(farthest, table)
+    return np.array(landmarks, dtype=np.int32), tables
+
+
+def compact_tables(tables: list[np.ndarray]) -> np.ndarray:
+    """Stack the cost tables into an array of shape (states, landmarks) of the smallest exact type.
+
+    Integral costs are stored as uint16 (infinity as `UINT16_UNREACHABLE`) or float32 if small enough,
+    other costs as float64.
+    """
+    distances = np.stack(tables, axis=1)
+    if is_integral_cost_table(distances):
+        largest = distances[np.isfinite(distances)].max(initial=0)
+        if largest < UINT16_UNREACHABLE:
+            return np.where(np.isfinite(distances), distances, UINT16_UNREACHABLE).astype(np.uint16)
+        if largest < FLOAT32_EXACT_LIMIT:
+            return distances.astype(np.float32)
+    return distances
+
+
+@dataclass
+class LandmarkTables:
+    """Costs from all states of a map to its landmarks, see `select_landmarks`."""
+
+    landmarks: np.ndarray  # State ids of the landmarks
+    distances: np.ndarray  # Costs indexed by [state id, landmark], see `compact_tables`
+    fingerprint: int  # See `map_fingerprint`
+
+    @classmethod
+    def compute(cls, map: Map, cost_table: np.ndarray, count: int = 8, first: int | None = None) -> Self:
+        landmarks, tables = select_landmarks(map, cost_table, count, first)
+        return cls(landmarks, compact_tables(tables), map_fingerprint(map, cost_table))
+
+    @property
+    def integral(self) -> bool:
+        """Return True if all costs in the tables are integers."""
+        return self.distances.dtype == np.uint16 or is_integral_cost_table(self.distances)
+
+    def costs_of(self, ids: np.ndarray | int) -> np.ndarray:
+        """Return the costs from the given states to all landmarks as float64, infinity if unreachable."""
+        costs = self.distances[ids].astype(np.float64)
+        if self.distances.dtype == np.uint16:
+            costs[self.distances[ids] == UINT16_UNREACHABLE] = np.inf
+        return costs
+
+    def matches(self, map: Map, cost_table: np.ndarray) -> bool:
+        """Return True if the tables were computed for this map and costs."""
+        return self.fingerprint == map_fingerprint(map, cost_table)
+
+    def save(self, fpath: os.PathLike) -> None:
+        np.savez(fpath, landmarks=self.landmarks, distances=self.distances, fingerprint=np.uint32(self.fingerprint))
+
+    @classmethod
+    def load(cls, fpath: os.PathLike) -> Self:
+        with np.load(fpath) as data:
+            return cls(data["landmarks"], data["distances"], int(data["fingerprint"]))
+
+    @classmethod
+    def for_map_file(cls, map_path: os.PathLike, map: Map, cost_table: np.ndarray, count: int = 8) -> Self:
+        """Load the tables saved next to the map file if they match the map, otherwise compute and save them."""
+        path = landmarks_path(map_path)
+        if path.exists():
+            tables = cls.load(path)
+            if tables.matches(map, cost_table) and len(tables.landmarks) >= count:
+                return tables
+        tables = cls.compute(map, cost_table, count)
+        tables.save(path)
+        return tables
+
+
+def landmarks_path(map_path: os.PathLike) -> Path:
+    """Return the path of the landmark tables of the map file."""
+    return Path(map_path).with_suffix(LANDMARKS_SUFFIX)
@@ -1,12 +1,15 @@
+import mmap
 import os
 from dataclasses import dataclass, field
 from enum import Enum, IntEnum, IntFlag
 from functools import cached_property
 from pathlib import Path
-from typing import Iterator, Self, Sequence
+from typing import Iterable, Iterator, Mapping, Self, Sequence
 
+import numpy as np
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class MazeVec:
     """A 2D vector-like class used to represent maze coordinates (r,c)."""
 
@@ -29,15 +32,24 @@ class MazeVec:
     def __sub__(self, other: Self) -> Self:
         return self.__class__(self.r - other.r, self.c - other.c)
 
-    @cached_property
+    @property
     def norm(self):
         return (self.r**2 + self.c**2) ** 0.5
 
 
+@dataclass(frozen=True, slots=True)
 class State(MazeVec):
-    """Representation of State in all maze-related environments."""
+    """Representation of State in all maze-related environments.
+
+    States obtained from a map (see `Map.states`) are canonical instances carrying
+    their integer `id` (`r * width + c`); other states have `id` -1.
+    The `id` takes no part in comparison and hashing.
+    """
+
+    id: int = field(default=-1, compare=False, repr=False)
 
-    pass
+    def __hash__(self):
+        return (self.r << 32) + self.c
 
 
 class Action(IntEnum):
@@ -63,6 +75,10 @@ class Action(IntEnum):
             return MazeVec(r=0, c=-1)
         assert False, "Unreachable"
 
+    def delta(self) -> tuple[int, int]:
+        """Return the (row, column) change caused by the action."""
+        return _ACTION_DELTAS[self]
+
     def __str__(self):
         """Return a character represeting the action."""
         if self == Action.UP:
@@ -76,6 +92,9 @@ class Action(IntEnum):
         assert False, "Unreachable"
 
 
+_ACTION_DELTAS: tuple[tuple[int, int], ...] = tuple((action.to_vec().r, action.to_vec().c) for action in Action)
+
+
 class Role(Enum):
     """Role of a cell in a map."""
 
@@ -86,6 +105,14 @@ class Role(Enum):
     DANGER = "D"
 
 
+ROLE_CODE: Mapping[Role, int] = {role: ord(role.value) for role in Role}
+"""Code of each role as stored in role grids: the ASCII code of its map character."""
+
+_ROLE_OF_CODE: list[Role | None] = [None] * 256
+for _role, _code in ROLE_CODE.items():
+    _ROLE_OF_CODE[_code] = _role
+
+
 class Border(IntFlag):
     """Flags representing existing borders of a map cell."""
 
@@ -124,13 +151,234 @@ class Cell:
     #     return self.border.bit_count() < 2
 
 
+def compute_predecessor_table(successor_table: np.ndarray) -> np.ndarray:
+    """Return the reverse transitions of a successor table.
+
+    The result is an int32 array of the same shape; item [id, action] is the id of the state
+    from which the action leads to the state `id`, or -1 if there is no such other state.
+    """
+    ids = np.arange(len(successor_table), dtype=np.int32)
+    table = np.full_like(successor_table, -1)
+    for action in Action:
+        successors = successor_table[:, action]
+        moved = successors != ids
+        table[successors[moved], action] = ids[moved]
+    return table
+
+
+class StatePool:
+    """Interned, canonical State instances of a map, one per cell.
+
+    The states are created lazily on first access and reused afterwards,
+    so transitions do not allocate new objects.
+    """
+
+    def __init__(self, height: int, width: int):
+        self.height = height
+        self.width = width
+        self._states: list[State | None] = [None] * (height * width)
+
+    def __len__(self):
+        return len(self._states)
+
+    def __getitem__(self, id: int) -> State:
+        """Return the canonical state with the given id."""
+        state = self._states[id]
+        if state is None:
+            r, c = divmod(id, self.width)
+            state = self._states[id] = State(r, c, id)
+        return state
+
+    def at(self, r: int, c: int) -> State:
+        """Return the canonical state at (r, c); a new State if it lies outside the map."""
+        if 0 <= r < self.height and 0 <= c < self.width:
+            return self[r * self.width + c]
+        return State(r, c)
+
+    def canonical(self, state: State) -> State:
+        """Return the canonical instance equal to the state."""
+        return self.at(state.r, state.c)
+
+    def id_of(self, state: State) -> int:
+        """Return the integer id of a state inside the map."""
+        return state.r * self.width + state.c
+
+
+def compute_border_grid(role_grid: np.ndarray, border_grid: np.ndarray | None = None) -> np.ndarray:
+    """Return `Border` flags of all cells given the role grid, without any per-cell loop.
+
+    A cell has a border in a direction if
+    - the cell is a wall (walls have borders on all sides),
+    - the neighbor in that direction is a wall or lies outside the map, while the cell is free, or
+    - the border is already present in the optional `border_grid` (explicit borders are kept).
+    """
+    free = role_grid != ROLE_CODE[Role.WALL]
+    height, width = free.shape
+    # Cells outside the map behave as walls
+    padded = np.pad(free, 1, constant_values=False)
+    borders = np.zeros(free.shape, dtype=np.uint8)
+    for action in Action:
+        delta = action.to_vec()
+        neighbor_free = padded[1 + delta.r : 1 + delta.r + height, 1 + delta.c : 1 + delta.c + width]
+        borders |= (free != neighbor_free).view(np.uint8) << np.uint8(action)
+    borders[~free] = Border.TOP | Border.RIGHT | Border.BOTTOM | Border.LEFT
+    if border_grid is not None:
+        borders |= border_grid
+    return borders
+
+
+def compute_borders_at(role_grid: np.ndarray, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """Return `Border` flags of the cells at (rows, cols) derived from the role grid.
+
+    Uses the same rules as `compute_border_grid` (without any explicitly given borders),
+    but only for the selected cells; used to update borders after map edits.
+    """
+    height, width = role_grid.shape
+    free = role_grid[rows, cols] != ROLE_CODE[Role.WALL]
+    borders = np.zeros(len(rows), dtype=np.uint8)
+    for action in Action:
+        dr, dc = _ACTION_DELTAS[action]
+        neighbor_rows, neighbor_cols = rows + dr, cols + dc
+        inside = (0 <= neighbor_rows) & (neighbor_rows < height) & (0 <= neighbor_cols) & (neighbor_cols < width)
+        neighbor_free = np.zeros(len(rows), dtype=bool)
+        neighbor_free[inside] = role_grid[neighbor_rows[inside], neighbor_cols[inside]] != ROLE_CODE[Role.WALL]
+        borders |= (free != neighbor_free).view(np.uint8) << np.uint8(action)
+    borders[~free] = Border.TOP | Border.RIGHT | Border.BOTTOM | Border.LEFT
+    return borders
+
+
+def compute_successors_of(border_grid: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """Return rows of `compute_successor_table` for the given state ids only."""
+    height, width = border_grid.shape
+    ids = np.asarray(ids, dtype=np.int32)
+    rows, cols = np.divmod(ids, width)
+    borders = border_grid.ravel()[ids]
+    table = np.empty((len(ids), len(Action)), dtype=np.int32)
+    for action in Action:
+        dr, dc = _ACTION_DELTAS[action]
+        possible = ((borders >> np.uint8(action)) & 1) == 0
+        possible &= (0 <= rows + dr) & (rows + dr < height) & (0 <= cols + dc) & (cols + dc < width)
+        table[:, action] = np.where(possible, ids + (dr * width + dc), ids)
+    return table
+
+
+def compute_successor_table(border_grid: np.ndarray) -> np.ndarray:
+    """Return the successor ids of all states and actions given the border grid.
+
+    The result is an int32 array of shape (height * width, 4); see `Map.successor_table`.
+    Actions blocked by a border or leading outside the map keep the state in place.
+    """
+    height, width = border_grid.shape
+    ids = np.arange(height * width, dtype=np.int32).reshape(height, width)
+    rows, cols = np.indices((height, width), sparse=True)
+    table = np.empty((height * width, len(Action)), dtype=np.int32)
+    for action in Action:
+        dr, dc = _ACTION_DELTAS[action]
+        possible = ((border_grid >> np.uint8(action)) & 1) == 0
+        possible &= (0 <= rows + dr) & (rows + dr < height) & (0 <= cols + dc) & (cols + dc < width)
+        table[:, action] = np.where(possible, ids + (dr * width + dc), ids).ravel()
+    return table
+
+
+def compute_component_grid(role_grid: np.ndarray, border_grid: np.ndarray) -> np.ndarray:
+    """Return labels of connected components of free cells as an int32 array of shape (height, width).
+
+    Components are numbered from 0 in row-major order of their first cell, walls get -1.
+    Two neighboring free cells are connected if a transition is possible at least in one direction,
+    i.e., the components are weakly connected. For maps with borders derived from roles only
+    (see `compute_border_grid`), all transitions are symmetric and weak and strong connectivity coincide.
+    The labelling uses vectorized hooking and pointer jumping over all edges, no per-cell loop.
+    """
+    height, width = role_grid.shape
+    ids = np.arange(height * width, dtype=np.int32).reshape(height, width)
+    free = role_grid != ROLE_CODE[Role.WALL]
+    right = free[:, :-1] & free[:, 1:] & ~(
+        ((border_grid[:, :-1] & Border.RIGHT) != 0) & ((border_grid[:, 1:] & Border.LEFT) != 0)
+    )
+    down = free[:-1, :] & free[1:, :] & ~(
+        ((border_grid[:-1, :] & Border.BOTTOM) != 0) & ((border_grid[1:, :] & Border.TOP) != 0)
+    )
+    u = np.concatenate([ids[:, :-1][right], ids[:-1, :][down]])
+    v = np.concatenate([ids[:, 1:][right], ids[1:, :][down]])
+    labels = ids.ravel().copy()
+    while u.size:
+        lu, lv = labels[u], labels[v]
+        differ = lu != lv
+        u, v, lu, lv = u[differ], v[differ], lu[differ], lv[differ]
+        # Hook the larger root under the smallest neighboring root
+        np.minimum.at(labels, np.maximum(lu, lv), np.minimum(lu, lv))
+        # Pointer jumping until every label is a root again
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+    free = free.ravel()
+    is_root = (labels == ids.ravel()) & free
+    compact = np.cumsum(is_root, dtype=np.int32) - 1
+    return np.where(free, compact[labels], -1).astype(np.int32).reshape(height, width)
+
+
+_IS_ROLE_CODE = np.zeros(256, dtype=bool)
+_IS_ROLE_CODE[list(ROLE_CODE.values())] = True
+
+
+def role_grid_from_buffer(buffer: bytes | mmap.mmap) -> np.ndarray:
+    """Decode a text map held in a bytes-like buffer into a role grid.
+
+    The text shall obey format for `Map.from_string`: empty rows are skipped,
+    white space around rows is ignored, and rows shorter than the longest one are padded with walls.
+    Rows are copied from the buffer one at a time, so no other per-cell copy of the map is created.
+    Invalid characters raise ValueError, and the buffer can still be closed afterwards:
+
+    >>> with mmap.mmap(-1, 7) as buffer:
+    ...     _ = buffer.write(b".S.\\n.x.")
+    ...     role_grid_from_buffer(buffer)
+    Traceback (most recent call last):
+    ValueError: Map: Invalid character 'x' at (r=1, c=1)
+    """
+    # First pass: find the extent of all non-empty rows
+    spans: list[tuple[int, int]] = []
+    start = 0
+    size = len(buffer)
+    while start < size:
+        end = buffer.find(b"\n", start)
+        if end < 0:
+            end = size
+        line = buffer[start:end]
+        row = line.strip()
+        if row:
+            spans.append((start + len(line) - len(line.lstrip()), len(row)))
+        start = end + 1
+    width = max((length for _, length in spans), default=0)
+    # Second pass: decode the rows into the grid
+    role_grid = np.full((len(spans), width), ROLE_CODE[Role.WALL], dtype=np.uint8)
+    for r, (offset, length) in enumerate(spans):
+        row = np.frombuffer(buffer, dtype=np.uint8, count=length, offset=offset)
+        try:
+            invalid = np.flatnonzero(~_IS_ROLE_CODE[row])
+            if invalid.size:
+                c = int(invalid[0])
+                raise ValueError(f"Map: Invalid character {chr(row[c])!r} at ({r=}, {c=})")
+            role_grid[r, :length] = row
+        finally:
+            del row  # Release the view of the buffer, also on errors, so that the buffer can be closed
+    return role_grid
+
+
 class Map:
     """Map of a maze represented as a collection of cells.
 
     Map contains the constant part of a maze (the obstacles, walls, and free/empty cells),
     and also the default start and goal states if specified.
+
+    Besides the cells, `role_grid` and `border_grid` hold the `ROLE_CODE`s and `Border` flags
+    of all cells as uint8 arrays of shape (height, width), intended for vectorized solvers.
     """
 
+    version: int = 0
+    """Number of edits applied to the map. Caches derived from the map compare it to detect changes."""
+
     def __init__(self, cells: Sequence[Cell] | None = None):
         cells = cells or [Cell()]
         self.cell_at: dict[State, Cell] = {}
@@ -185,6 +433,36 @@ class Map:
             content = f.read()
         return cls.from_string(content)
 
+    @classmethod
+    def load_binary(cls, fpath: os.PathLike, mmap_mode: str | None = "r") -> "GridMap":
+        """Load a map saved by `Map.save_binary` as a GridMap.
+
+        The file is memory-mapped (unless `mmap_mode` is None), so no per-cell work is done;
+        with the default read-only mode, the grids of the loaded map cannot be modified.
+        """
+        grids = np.load(fpath, mmap_mode=mmap_mode, allow_pickle=False)
+        if grids.dtype != np.uint8 or grids.ndim != 3 or grids.shape[0] != 2:
+            raise ValueError(
+                f"Map: {fpath} is not a binary map: expected uint8 array of shape (2, height, width), "
+                f"got {grids.dtype} array of shape {grids.shape}"
+            )
+        return GridMap(grids[0], grids[1])
+
+    def save_binary(self, fpath: os.PathLike) -> None:
+        """Save the map in the binary map format.
+
+        The format is a .npy file holding a uint8 array of shape (2, height, width)
+        with `role_grid` and `border_grid`, so that it can be loaded with `Map.load_binary`
+        (or `numpy.load`) without parsing and without recomputing the borders.
+        """
+        grids = np.lib.format.open_memmap(
+            fpath, mode="w+", dtype=np.uint8, shape=(2, self.height, self.width)
+        )
+        grids[0] = self.role_grid
+        grids[1] = self.border_grid
+        grids.flush()
+        del grids
+
     @cached_property
     def width(self) -> int:
         return max(cell.position.c for cell in self.cell_at.values()) + 1
@@ -193,6 +471,11 @@ class Map:
     def height(self) -> int:
         return max(cell.position.r for cell in self.cell_at.values()) + 1
 
+    @cached_property
+    def states(self) -> StatePool:
+        """Return the pool of canonical states of this map."""
+        return StatePool(self.height, self.width)
+
     @cached_property
     def start(self) -> State | None:
         """Return the start state as specified in the map, or None."""
@@ -218,6 +501,67 @@ class Map:
             if self.transition_possible(state, action)
         ]
 
+    @cached_property
+    def successor_table(self) -> np.ndarray:
+        """Return the compiled transitions as an int32 array of shape (height * width, 4).
+
+        Item [id, action] is the id of the state resulting from applying action
+        in the state with the given id (the same id if the action is not possible).
+        """
+        return compute_successor_table(self.border_grid)
+
+    def changed_ids_since(self, version: int) -> np.ndarray | None:
+        """Return ids of the cells whose role or borders changed after the given version.
+
+        Return None if the changes are not known anymore; derived caches shall be rebuilt then.
+        Map is never edited, see `GridMap.set_roles` for maps that are.
+        """
+        return np.empty(0, dtype=np.int32)
+
+    @cached_property
+    def component_grid(self) -> np.ndarray:
+        """Return labels of connected components of free cells, see `compute_component_grid`."""
+        return compute_component_grid(self.role_grid, self.border_grid)
+
+    @cached_property
+    def component_has_goal(self) -> np.ndarray:
+        """Return a bool array telling for each component label whether it contains a goal."""
+        component_grid = self.component_grid
+        has_goal = np.zeros(int(component_grid.max()) + 1, dtype=bool)
+        has_goal[component_grid[self.role_grid == ROLE_CODE[Role.GOAL]]] = True
+        return has_goal
+
+    def component_of(self, state: State) -> int:
+        """Return the label of the connected component containing the state, -1 for walls."""
+        if not self.contains(state):
+            return -1
+        return self.component_grid.item(state.r, state.c)
+
+    def are_connected(self, state1: State, state2: State) -> bool:
+        """Return True if both states lie in the same connected component."""
+        component = self.component_of(state1)
+        return component >= 0 and component == self.component_of(state2)
+
+    def is_goal_reachable(self, state: State) -> bool:
+        """Return True if any goal lies in the connected component of the state.
+
+        If False, no goal can be reached from the state and solvers can skip it.
+        """
+        component = self.component_of(state)
+        return component >= 0 and bool(self.component_has_goal[component])
+
+    @cached_property
+    def predecessor_table(self) -> np.ndarray:
+        """Return the compiled reverse transitions, see `compute_predecessor_table`.
+
+        Item [id, action] is the id of the state in which the action leads to the state `id`, or -1.
+        """
+        return compute_predecessor_table(self.successor_table)
+
+    def contains(self, state: State) -> bool:
+        """Return True if the state lies inside the map bounds."""
+        return 0 <= state.r < self.height and 0 <= state.c < self.width
+
     def transition_possible(self, state: State, action: Action) -> bool:
         return not self[state].border.prevents_action(action)
 
@@ -226,6 +570,9 @@ class Map:
 
         If the action is not possible, return the same state.
         """
+        if self.contains(state):
+            states = self.states
+            return states[self.successor_table.item(states.id_of(state), action)]
         if not self.transition_possible(state, action):
             return state
         return state + action.to_vec()
@@ -250,33 +597,225 @@ class Map:
 
     def all_states(self):
         """Generate all states, including walls."""
-        for row in range(self.height):
-            for col in range(self.width):
-                yield State(c=col, r=row)
+        states = self.states
+        for id in range(len(states)):
+            yield states[id]
 
     # def __iter__(self):
     #     for pos in self.all_states():
     #         yield self[pos]
 
     def _complete(self) -> None:
+        role_grid = np.full((self.height, self.width), ROLE_CODE[Role.WALL], dtype=np.uint8)
+        border_grid = np.zeros_like(role_grid)
+        for state, cell in self.cell_at.items():
+            if 0 <= state.r < self.height and 0 <= state.c < self.width:
+                role_grid[state.r, state.c] = ROLE_CODE[cell.role]
+                border_grid[state.r, state.c] = cell.border
+        border_grid = compute_border_grid(role_grid, border_grid)
         for state in self.all_states():
-            square = self[state]
-            assert state == square.position
-            border: Border = Border.NONE
-            for direction in Action:
-                if self._shall_have_border(square, direction):
-                    border |= Border.corresponding_to(direction)
-            self.cell_at[state] = Cell(state, square.role, border)
-
-    def _shall_have_border(self, square: Cell, direction: Action) -> bool:
-        # If the square is a wall, it shall have border in any direction
-        if square.role == Role.WALL:
-            return True
-        # If there is a border, leave it there
-        if Border.corresponding_to(direction) in square.border:
-            return True
-        # Signal border if there is a boundary between EMPTY and WALL
-        neighbor = self.neighbor_cell(square, direction)
-        if square.is_free() != neighbor.is_free():
-            return True
-        return False
+            self.cell_at[state] = Cell(
+                state,
+                _ROLE_OF_CODE[role_grid.item(state.r, state.c)],
+                Border(border_grid.item(state.r, state.c)),
+            )
+        self.role_grid = role_grid
+        self.border_grid = border_grid
+
+
+MAX_CHANGE_LOG = 1024
+"""Number of the last GridMap edits whose changed cells are remembered, see `GridMap.changed_ids_since`."""
+
+
+class GridMap(Map):
+    """Map of a maze backed by two contiguous uint8 arrays of shape (height, width).
+
+    `role_grid` holds the `ROLE_CODE` of each cell and `border_grid` holds its `Border` flags.
+    No `Cell` instances are stored; they are created on demand by `__getitem__` and `__iter__`,
+    so GridMap can be used wherever a Map is expected, while vectorized solvers
+    can work with the arrays directly. Suitable for large maps.
+
+    Unlike Map, GridMap can be edited (see `set_roles`); each edit increases `version`.
+    """
+
+    def __init__(self, role_grid: np.ndarray, border_grid: np.ndarray | None = None):
+        role_grid = np.ascontiguousarray(role_grid, dtype=np.uint8)
+        if role_grid.ndim != 2 or role_grid.size == 0:
+            raise ValueError(f"GridMap: role grid must be a non-empty 2D array, got shape {role_grid.shape}")
+        self.role_grid = role_grid
+        if border_grid is None:
+            self._complete()
+        else:
+            border_grid = np.ascontiguousarray(border_grid, dtype=np.uint8)
+            if border_grid.shape != role_grid.shape:
+                raise ValueError(
+                    f"GridMap: border grid shape {border_grid.shape} does not match role grid shape {role_grid.shape}"
+                )
+            self.border_grid = border_grid
+        self.version = 0
+        self._change_log: list[tuple[int, np.ndarray]] = []
+
+    def set_role(self, state: State, role: Role) -> None:
+        """Change the role of a single cell, see `set_roles`."""
+        self.set_roles([(state, role)])
+
+    def set_roles(self, edits: Iterable[tuple[State, Role]]) -> None:
+        """Change roles of several cells at once.
+
+        Borders are recomputed only for the edited cells and their neighbors
+        (from roles only, explicitly given borders of these cells are dropped).
+        The map version is increased by one and the cached properties of the map are updated:
+        the successor table is patched for the changed cells, the others are rebuilt when needed.
+        """
+        edits = list(edits)
+        if not edits:
+            return
+        if not self.role_grid.flags.writeable or not self.border_grid.flags.writeable:
+            raise ValueError("GridMap: The map is read-only and cannot be edited.")
+        for state, _ in edits:
+            if not self.contains(state):
+                raise ValueError(f"GridMap: Cannot edit {state} outside the map.")
+        rows = np.array([state.r for state, _ in edits], dtype=np.int32)
+        cols = np.array([state.c for state, _ in edits], dtype=np.int32)
+        self.role_grid[rows, cols] = [ROLE_CODE[role] for _, role in edits]
+        # The edited cells and their neighbors may need new borders
+        affected_rows = [rows]
+        affected_cols = [cols]
+        for dr, dc in _ACTION_DELTAS:
+            inside = (0 <= rows + dr) & (rows + dr < self.height) & (0 <= cols + dc) & (cols + dc < self.width)
+            affected_rows.append(rows[inside] + dr)
+            affected_cols.append(cols[inside] + dc)
+        affected = np.unique(np.concatenate(affected_rows) * self.width + np.concatenate(affected_cols))
+        affected_rows, affected_cols = np.divmod(affected, self.width)
+        borders = compute_borders_at(self.role_grid, affected_rows, affected_cols)
+        border_changed = borders != self.border_grid[affected_rows, affected_cols]
+        self.border_grid[affected_rows, affected_cols] = borders
+        changed = np.union1d(rows * self.width + cols, affected[border_changed]).astype(np.int32)
+        self.version += 1
+        self._change_log.append((self.version, changed))
+        del self._change_log[:-MAX_CHANGE_LOG]
+        self._update_caches(affected[border_changed].astype(np.int32))
+
+    def changed_ids_since(self, version: int) -> np.ndarray | None:
+        """Return ids of the cells whose role or borders changed after the given version.
+
+        Return None if the changes are not known anymore (only the last `MAX_CHANGE_LOG` edits are kept);
+        derived caches shall be rebuilt then.
+        """
+        if version == self.version:
+            return np.empty(0, dtype=np.int32)
+        if not self._change_log or self._change_log[0][0] > version + 1:
+            return None
+        return np.unique(np.concatenate([ids for v, ids in self._change_log if v > version]))
+
+    def _update_caches(self, border_changed: np.ndarray) -> None:
+        """Update the cached properties after an edit."""
+        successors = compute_successors_of(self.border_grid, border_changed)
+        if "predecessor_table" in self.__dict__:
+            # Only the neighbors of the changed cells may have gained or lost them as predecessors
+            rows, cols = np.divmod(border_changed, self.width)
+            for action in Action:
+                dr, dc = _ACTION_DELTAS[action]
+                inside = (0 <= rows + dr) & (rows + dr < self.height) & (0 <= cols + dc) & (cols + dc < self.width)
+                neighbors = border_changed[inside] + (dr * self.width + dc)
+                moves = successors[inside, action] == neighbors
+                self.predecessor_table[neighbors, action] = np.where(moves, border_changed[inside], -1)
+        if "successor_table" in self.__dict__:
+            self.successor_table[border_changed] = successors
+        for name in ("number_of_accessible_states", "start", "goals", "dangers", "component_grid", "component_has_goal"):
+            self.__dict__.pop(name, None)
+
+    def __str__(self) -> str:
+        """Return a string representation of the map."""
+        return "\n".join(row.tobytes().decode("ascii") for row in self.role_grid)
+
+    @cached_property
+    def number_of_accessible_states(self):
+        return int(np.count_nonzero(self.role_grid != ROLE_CODE[Role.WALL]))
+
+    @classmethod
+    def from_string(cls, input: str) -> Self:
+        """Create a grid map from a string.
+
+        The string shall obey format for `Map.from_string`.
+        Rows shorter than the longest one are padded with walls.
+        """
+        return cls(role_grid_from_buffer(input.encode("utf-8")))
+
+    @classmethod
+    def from_file(cls, fpath: os.PathLike) -> Self:
+        """Create a grid map from a text file.
+
+        The file is memory-mapped and its rows are decoded straight into the role grid,
+        so the peak memory is about one byte per cell.
+        The text file contents shall obey format for `Map.from_string`.
+        """
+        with Path(fpath).open("rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return cls.from_string("")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                return cls(role_grid_from_buffer(buffer))
+
+    @classmethod
+    def from_map(cls, map: Map) -> Self:
+        """Create a grid map with the same cells as an existing map.
+
+        The grids are copied, so that edits of the grid map do not leak into the existing map.
+        """
+        return cls(map.role_grid.copy(), map.border_grid.copy())
+
+    @property
+    def width(self) -> int:
+        return self.role_grid.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.role_grid.shape[0]
+
+    @cached_property
+    def start(self) -> State | None:
+        """Return the start state as specified in the map, or None."""
+        starts = self._states_with_role(Role.START)
+        if len(starts) > 1:
+            raise ValueError(f"Map: Multiple start squares are prohibited: {starts}")
+        return starts[0] if starts else None
+
+    @cached_property
+    def goals(self) -> set[State]:
+        """Return the set goal states as specified in the map."""
+        return set(self._states_with_role(Role.GOAL))
+
+    @cached_property
+    def dangers(self) -> set[State]:
+        """Return the set danger states as specified in the map."""
+        return set(self._states_with_role(Role.DANGER))
+
+    def _states_with_role(self, role: Role) -> list[State]:
+        return [self.states[int(id)] for id in np.flatnonzero(self.role_grid == ROLE_CODE[role])]
+
+    def transition_possible(self, state: State, action: Action) -> bool:
+        if not self.contains(state):
+            return super().transition_possible(state, action)
+        return not (self.border_grid.item(state.r, state.c) >> action) & 1
+
+    def __len__(self):
+        return self.role_grid.size
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            key = State(*key)
+        if not self.contains(key):
+            # If cell not defined, return a wall
+            return Cell(position=key, role=Role.WALL, border=Border.NONE)
+        return Cell(
+            position=self.states.canonical(key),
+            role=_ROLE_OF_CODE[self.role_grid.item(key.r, key.c)],
+            border=Border(self.border_grid.item(key.r, key.c)),
+        )
+
+    def __iter__(self):
+        """Iterate over map squares"""
+        return (self[state] for state in self.all_states())
+
+    def _complete(self) -> None:
+        self.border_grid = compute_border_grid(self.role_grid)
@@ -0,0 +1,51 @@
+"""
+Extension module for converting text and image maps to the binary map format.
+
+The binary format is described in `kuimaze2.map.Map.save_binary`.
+Usage from the command line:
+
+    python -m kuimaze2.map_binary maze1.txt maze2.png ...
+"""
+
+import argparse
+import os
+from pathlib import Path
+
+from kuimaze2.map import GridMap, Map
+
+
+BINARY_SUFFIX = ".npy"
+TEXT_SUFFIXES = (".txt", ".map")
+
+
+def load_map(fpath: os.PathLike) -> Map:
+    """Load a map from a binary, text, or image file, based on the file suffix."""
+    fpath = Path(fpath)
+    if fpath.suffix == BINARY_SUFFIX:
+        return Map.load_binary(fpath)
+    if fpath.suffix in TEXT_SUFFIXES:
+        return GridMap.from_file(fpath)
+    # Images need PIL, import the extension only when needed
+    from kuimaze2.map_image import map_from_image
+
+    return map_from_image(fpath)
+
+
+def convert_to_binary(src_fpath: os.PathLike, dst_fpath: os.PathLike | None = None) -> Path:
+    """Convert a text or image map to the binary map format.
+
+    If `dst_fpath` is not given, the binary map is saved next to the source file.
+    Return the path of the binary map.
+    """
+    src_fpath = Path(src_fpath)
+    dst_fpath = Path(dst_fpath) if dst_fpath else src_fpath.with_suffix(BINARY_SUFFIX)
+    load_map(src_fpath).save_binary(dst_fpath)
+    return dst_fpath
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert text and image maps to the binary map format.")
+    parser.add_argument("maps", nargs="+", type=Path, help="text (.txt, .map) or image map files")
+    args = parser.parse_args()
+    for fpath in args.maps:
+        print(f"{fpath} -> {convert_to_binary(fpath)}")
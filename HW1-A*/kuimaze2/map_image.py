@@ -3,9 +3,10 @@ Extension module for converting a kuimaze2.map.Map to and from a bitmap image.
 """
 
 import os
+import numpy as np
 from PIL import Image
 
-from kuimaze2.map import Map, Cell, State, Role
+from kuimaze2.map import GridMap, Map, Role, ROLE_CODE
 
 
 COLOR_FOR_ROLE_DEFAULT = {
@@ -19,24 +20,40 @@ COLOR_FOR_ROLE_DEFAULT = {
 ROLE_FROM_COLOR_DEFAULT = {value: key for key, value in COLOR_FOR_ROLE_DEFAULT.items()}
 
 
+def _pack_colors(rgb: np.ndarray) -> np.ndarray:
+    """Pack (..., 3) uint8 RGB values into single uint32 values 0xRRGGBB."""
+    rgb = rgb.astype(np.uint32)
+    return (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+
 
 def map_from_image(
         image_fpath: os.PathLike, 
         role_from_color: dict[tuple[int, int, int], Role] | None = None
-    ) -> Map:
-    """Load a map from a bitmap image."""
+    ) -> GridMap:
+    """Load a map from a bitmap image.
+
+    Pixels of colors without a specified role become Role.EMPTY;
+    a single warning summarizes all such colors.
+    """
     role_from_color = role_from_color or ROLE_FROM_COLOR_DEFAULT
-    image = Image.open(image_fpath)
-    cells = []
-    for r in range(image.height):
-        for c in range(image.width):
-            pix_color = image.getpixel((c, r)) # PIL assumes (x, y), not (r, c)
-            if pix_color not in role_from_color:
-                print(f"--- WARNING: No role specified for color: {pix_color} at ({r=}, {c=}). Using Role.EMPTY.")
-            role = role_from_color.get(pix_color, Role.EMPTY)
-            cell = Cell(position=State(r, c), role=role)
-            cells.append(cell)
-    return Map(cells=cells)
+    with Image.open(image_fpath) as image:
+        pixels = _pack_colors(np.asarray(image.convert("RGB")))
+    # Palette lookup table: sorted packed colors and the corresponding role codes
+    palette = _pack_colors(np.array(list(role_from_color.keys()), dtype=np.uint8).reshape(-1, 3))
+    codes = np.array([ROLE_CODE[role] for role in role_from_color.values()], dtype=np.uint8)
+    order = np.argsort(palette)
+    palette, codes = palette[order], codes[order]
+    index = np.searchsorted(palette, pixels).clip(max=len(palette) - 1)
+    known = palette[index] == pixels
+    role_grid = np.where(known, codes[index], np.uint8(ROLE_CODE[Role.EMPTY]))
+    if not known.all():
+        unknown, counts = np.unique(pixels[~known], return_counts=True)
+        summary = ", ".join(
+            f"{(int(color) >> 16, (int(color) >> 8) & 255, int(color) & 255)}: {count} px"
+            for color, count in zip(unknown, counts)
+        )
+        print(f"--- WARNING: No role specified for {len(unknown)} color(s), using Role.EMPTY: {summary}")
+    return GridMap(role_grid)
 
 
 def image_from_map(
@@ -44,14 +61,19 @@ def image_from_map(
         image_fpath: os.PathLike, 
         color_for_role: dict[Role, tuple[int, int, int]] | None = None
     ) -> None:
-    """Save a map as a bitmap image."""
+    """Save a map as a bitmap image.
+
+    Cells of roles without a specified color are white;
+    a single warning lists all such roles.
+    """
     color_for_role = color_for_role or COLOR_FOR_ROLE_DEFAULT
-    image = Image.new("RGB", (map.width, map.height))
-    for r in range(map.height):
-        for c in range(map.width):
-            cell = map[State(r, c)]
-            if cell.role not in color_for_role:
-                print(f"--- WARNING: No color specified for role: {cell.role} at ({r=}, {c=}). Using white.")
-            color = color_for_role.get(cell.role, (255, 255, 255))
-            image.putpixel((c, r), color)
-    image.save(image_fpath)
+    # Palette lookup table indexed by role codes
+    color_of_code = np.full((256, 3), 255, dtype=np.uint8)
+    for role, color in color_for_role.items():
+        color_of_code[ROLE_CODE[role]] = color
+    missing = [role for role in Role if role not in color_for_role]
+    if missing:
+        present = [role for role in missing if np.any(map.role_grid == ROLE_CODE[role])]
+        if present:
+            print(f"--- WARNING: No color specified for role(s): {', '.join(str(role) for role in present)}. Using white.")
+    Image.fromarray(color_of_code[map.role_grid]).save(image_fpath)
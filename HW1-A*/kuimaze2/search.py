@@ -1,8 +1,12 @@
 from abc import ABC, abstractmethod
-from typing import Optional, Mapping
+from typing import Iterable, Optional, Mapping
 import tkinter as tk
 
-from kuimaze2.map import Map, State, Action, Role
+import numpy as np
+
+from kuimaze2.map import Map, State, Action, Role, ROLE_CODE
+from kuimaze2.distance_field import DistanceField, get_distance_field
+from kuimaze2.wavefront import compute_uniform_cost, wavefront
 from kuimaze2.rendering import SearchCanvas
 from kuimaze2 import keyboard
 
@@ -16,6 +20,19 @@ DEFAULT_COSTS: StateRoleCosts = {
     Role.WALL: float("inf"),
 }
 
+def compute_cost_table(role_grid: np.ndarray, costs: StateRoleCosts) -> np.ndarray:
+    """Return the cost of leaving each state as a float array of shape (height * width,).
+
+    The role grid may also be a 1D array of roles of selected states.
+
+    Roles missing in `costs` are treated as impassable (infinite cost).
+    """
+    cost_of_code = np.full(256, np.inf)
+    for role, cost in costs.items():
+        cost_of_code[ROLE_CODE[role]] = cost
+    return cost_of_code[role_grid.ravel()]
+
+
 class SearchProblem:
     
     def __init__(self,
@@ -43,6 +60,8 @@ class SearchProblem:
         self._goals: set[State] = self.map.goals
         self._costs: StateRoleCosts = costs or DEFAULT_COSTS
         self._visited: set[State] = set()
+        self._cost_table: np.ndarray = compute_cost_table(self.map.role_grid, self._costs)
+        self._map_version: int = self.map.version
         self._view: SearchView = NullSearchView(self) if not graphics else TkSearchView(self)
         
 
@@ -50,19 +69,60 @@ class SearchProblem:
     def from_string(cls, map):
         return cls(Map.from_string(map))
 
+    def __getstate__(self):
+        # The cost table is cheap to recompute and large to pickle, e.g., for process pools
+        state = self.__dict__.copy()
+        del state["_cost_table"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._cost_table = compute_cost_table(self.map.role_grid, self._costs)
+        self._map_version = self.map.version
+
+    @property
+    def cost_table(self) -> np.ndarray:
+        """Return the cost of leaving each state as a float array indexed by state ids."""
+        self._sync_with_map()
+        return self._cost_table
+
+    def _sync_with_map(self) -> None:
+        """Update the start, goals, and cost table after the map was edited."""
+        if self._map_version == self.map.version:
+            return
+        changed = self.map.changed_ids_since(self._map_version)
+        if changed is None:
+            self._cost_table = compute_cost_table(self.map.role_grid, self._costs)
+        else:
+            self._cost_table[changed] = compute_cost_table(self.map.role_grid.ravel()[changed], self._costs)
+        self._start = self.map.start
+        self._goals = self.map.goals
+        self._map_version = self.map.version
+
     def get_start(self) -> State:
         """Retrun the start state as specified in the map."""
+        self._sync_with_map()
         self._visited.add(self._start)
         return self._start
 
     def get_goals(self) -> set[State]:
         """Return the set of goal states as specified in the map."""
+        self._sync_with_map()
         return self._goals
 
     def is_goal(self, state):
         """Return True if the state is one of the goals."""
+        self._sync_with_map()
         return state in self._goals
 
+    def is_goal_reachable(self, state: State) -> bool:
+        """Return True if some goal may be reachable from the state.
+
+        Answered in O(1) from the connected components of the map. If False,
+        no search from the state can succeed.
+        """
+        return self.map.is_goal_reachable(state)
+
     def get_actions(self, state) -> list[Action]:
         """Return all actions that can be applied in the given state.
 
@@ -77,8 +137,80 @@ class SearchProblem:
         """
         successor = self.map.get_transition_result(state, action)
         self._visited.add(successor)
+        if self.map.contains(state):
+            return (successor, self.cost_table.item(self.map.states.id_of(state)))
         return (successor, self._costs[self.map[state].role])
-    
+
+    @property
+    def successor_table(self) -> np.ndarray:
+        """Return the compiled successor ids of the map, see `Map.successor_table`."""
+        return self.map.successor_table
+
+    def get_successors(self, state: State) -> list[tuple[State, float]]:
+        """Return the (new state, transition cost) pairs of all actions applicable in the given state.
+
+        Equivalent to calling `get_transition_result` for every action from `get_actions`,
+        in the order of actions, but answered in one call from the compiled successor table.
+        """
+        if not self.map.contains(state):
+            return [self.get_transition_result(state, action) for action in self.get_actions(state)]
+        states = self.map.states
+        id = states.id_of(state)
+        if self.map.role_grid.item(state.r, state.c) == ROLE_CODE[Role.WALL]:
+            return []
+        cost = self.cost_table.item(id)
+        successors = [states[successor_id] for successor_id in self.map.successor_table[id].tolist()]
+        self._visited.update(successors)
+        return [(successor, cost) for successor in successors]
+
+    def get_predecessors(self, state: State) -> list[tuple[State, float]]:
+        """Return the (previous state, transition cost) pairs of all transitions leading to the given state.
+
+        The reverse of `get_successors`, for searches running backwards from the goals:
+        the cost is the cost of the transition from the previous state to the given one.
+        Transitions that keep a state in place are not included.
+        """
+        if not self.map.contains(state):
+            return []
+        states = self.map.states
+        cost_table = self.cost_table
+        predecessors = [
+            states[predecessor_id]
+            for predecessor_id in self.map.predecessor_table[states.id_of(state)].tolist()
+            if predecessor_id >= 0
+        ]
+        self._visited.update(predecessors)
+        return [(predecessor, cost_table.item(predecessor.id)) for predecessor in predecessors]
+
+    def get_distance_field(self) -> DistanceField:
+        """Return the exact cost-to-go from all states to the nearest goal and the next optimal actions.
+
+        The field is computed by a single backward search from all goals (a vectorized wavefront
+        if all transitions cost the same, Dijkstra otherwise) and cached for the map version
+        and costs, so that repeated queries from any start state are answered in O(path length)
+        by `DistanceField.path_from`. It can also be used as a perfect heuristic.
+        """
+        costs_key = tuple(sorted((ROLE_CODE[role], float(cost)) for role, cost in self._costs.items()))
+        return get_distance_field(self.map, self.cost_table, costs_key)
+
+    def get_uniform_cost(self) -> Optional[float]:
+        """Return the common cost of all transitions from free non-goal states, or None if the costs differ."""
+        return compute_uniform_cost(self.map.role_grid, self.cost_table)
+
+    def wavefront(self, sources: Optional[Iterable[State]] = None, reverse: bool = True) -> tuple[np.ndarray, np.ndarray]:
+        """Return the step distances and directions of shortest paths between all cells and the sources.
+
+        A vectorized breadth-first search from all sources at once (the goals by default), see
+        `kuimaze2.wavefront.wavefront` for the returned grids. By default, the search runs
+        backwards, giving the number of steps from each cell to the nearest source and the first
+        action of a shortest path; with `reverse=False`, the steps from the nearest source to each cell.
+        The step distances are costs only if all transitions cost the same, see `get_uniform_cost`.
+        """
+        if sources is None:
+            sources = self.get_goals()
+        states = self.map.states
+        return wavefront(self.map, (states.id_of(source) for source in sources), reverse)
+
     def render(self, *args, **kwargs):
         """Display/update the graphical representation of the environment
 
@@ -0,0 +1,82 @@
+"""
+Extension module for sharing a map between processes through shared memory.
+
+The role and border grids of a map are published once into a `multiprocessing.shared_memory`
+block; worker processes attach to it without copying. A SharedGridMap pickles as a small
+reference to the shared memory, so problems built on it (SearchProblem, MDPProblem, RLProblem)
+can be sent to a process pool cheaply:
+
+    with SharedGridMap.publish(map) as shared_map:
+        with multiprocessing.Pool() as pool:
+            pool.map(solve, [SearchProblem(shared_map) for _ in range(n)])
+"""
+
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import Self
+
+import numpy as np
+
+from kuimaze2.map import GridMap, Map
+
+
+@dataclass(frozen=True)
+class SharedMapHandle:
+    """Picklable reference to a map published in shared memory."""
+
+    name: str
+    height: int
+    width: int
+
+
+class SharedGridMap(GridMap):
+    """Read-only GridMap whose role and border grids live in shared memory.
+
+    Create it with `SharedGridMap.publish()` in the owning process and with `SharedGridMap.attach()`
+    (or by unpickling) in other processes. Call `close()` (or use it as a context manager)
+    when done; closing the published map also frees the shared memory.
+    """
+
+    def __init__(self, shared_memory: SharedMemory, handle: SharedMapHandle, owner: bool = False):
+        grids = np.ndarray((2, handle.height, handle.width), dtype=np.uint8, buffer=shared_memory.buf)
+        grids.flags.writeable = False
+        super().__init__(grids[0], grids[1])
+        self.handle = handle
+        self._shared_memory = shared_memory
+        self._owner = owner
+
+    @classmethod
+    def publish(cls, map: Map) -> Self:
+        """Copy the grids of a map into a new shared memory block and return the shared map."""
+        height, width = map.height, map.width
+        shared_memory = SharedMemory(create=True, size=2 * height * width)
+        grids = np.ndarray((2, height, width), dtype=np.uint8, buffer=shared_memory.buf)
+        grids[0] = map.role_grid
+        grids[1] = map.border_grid
+        del grids
+        return cls(shared_memory, SharedMapHandle(shared_memory.name, height, width), owner=True)
+
+    @classmethod
+    def attach(cls, handle: SharedMapHandle) -> Self:
+        """Attach to a map published by another process, without copying the grids."""
+        return cls(SharedMemory(name=handle.name), handle)
+
+    def close(self) -> None:
+        """Detach from the shared memory; if this is the published map, free the shared memory."""
+        if self._shared_memory is None:
+            return
+        # The shared memory cannot be closed while the grids still refer to it
+        del self.role_grid, self.border_grid
+        self._shared_memory.close()
+        if self._owner:
+            self._shared_memory.unlink()
+        self._shared_memory = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __reduce__(self):
+        return (SharedGridMap.attach, (self.handle,))
@@ -0,0 +1,63 @@
+"""
+Vectorized breadth-first search (wavefront) for maps where all transitions cost the same.
+
+The whole frontier is expanded at once with NumPy operations on the compiled successor
+or predecessor table of the map, so the Python overhead is per BFS layer, not per state.
+"""
+
+from typing import Iterable
+
+import numpy as np
+
+from kuimaze2.map import Map, Role, ROLE_CODE
+
+
+UNREACHED = -1
+"""Distance of cells not reachable from (or, in reverse, not reaching) any source."""
+
+NO_DIRECTION = -1
+"""Direction of the sources and of unreached cells."""
+
+
+def compute_uniform_cost(role_grid: np.ndarray, cost_table: np.ndarray) -> float | None:
+    """Return the common cost of leaving any free non-goal state, or None if the costs differ."""
+    roles = role_grid.ravel()
+    leaving = (roles != ROLE_CODE[Role.WALL]) & (roles != ROLE_CODE[Role.GOAL])
+    costs = np.unique(cost_table[leaving])
+    if len(costs) != 1 or not 0 < costs[0] < float("inf"):
+        return None
+    return float(costs[0])
+
+
+def wavefront(map: Map, sources: Iterable[int], reverse: bool = False) -> tuple[np.ndarray, np.ndarray]:
+    """Run a breadth-first search from all the source state ids at once.
+
+    Return two grids of shape (height, width):
+    the number of steps from the nearest source to each cell (int32, `UNREACHED` if none),
+    and the direction of the last step of a shortest path (int8 `Action` values, `NO_DIRECTION`
+    for sources and unreached cells), so that the path is traced back against the directions.
+
+    If `reverse` is True, the search runs against the transitions, i.e., it returns the number
+    of steps from each cell to the nearest source, and the direction of the first step
+    of a shortest path from the cell to a source.
+    """
+    table = map.predecessor_table if reverse else map.successor_table
+    n = map.height * map.width
+    distances = np.full(n, UNREACHED, dtype=np.int32)
+    directions = np.full(n, NO_DIRECTION, dtype=np.int8)
+    frontier = np.unique(np.fromiter(sources, dtype=np.int64))
+    distances[frontier] = 0
+    actions = np.arange(table.shape[1], dtype=np.int8)
+    step = 0
+    while len(frontier):
+        step += 1
+        neighbors = table[frontier].ravel()
+        neighbor_actions = np.tile(actions, len(frontier))
+        new = neighbors >= 0
+        new[new] = distances[neighbors[new]] == UNREACHED
+        neighbors, neighbor_actions = neighbors[new], neighbor_actions[new]
+        distances[neighbors] = step
+        directions[neighbors] = neighbor_actions
+        # A cell reached from several frontier cells keeps one of the actions, each (cell, action) pair is unique
+        frontier = neighbors[directions[neighbors] == neighbor_actions]
+    return distances.reshape(map.height, map.width), directions.reshape(map.height, map.width)
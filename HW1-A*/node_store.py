@@ -0,0 +1,77 @@
+from kuimaze2 import Map, State, Action
+from kuimaze2.costs import FLOAT32_EXACT_LIMIT
+from array import array
+from typing import Optional
+
+
+"""
+Status of a state in the NodeStore.
+"""
+UNSEEN = 0
+OPEN = 1
+CLOSED = 2
+
+"""
+Parent action of states without a parent (the start).
+"""
+NO_PARENT = -1
+
+
+class NodeStore:
+    """
+    Search nodes of all states of a map in preallocated arrays indexed by state ids.
+
+    For every state, `g` holds the cost of the best known path, `parent` the action by which
+    the state was reached on it (one byte instead of the parent's id), and `status` whether
+    the state is UNSEEN, OPEN or CLOSED. The arrays come from the `array` module, whose items
+    are cheap to read and write from Python. Costs are stored in float32 when they are known
+    to be integers small enough to stay exact, so a state takes 6 bytes, 10 bytes otherwise.
+    """
+
+    def __init__(self, map: Map, max_cost: Optional[float] = None) -> None:
+        """
+        Allocate the store; `max_cost` is an integer upper bound on the path costs, if known.
+        """
+        n = map.height * map.width
+        self.map = map
+        cost_type = "f" if max_cost is not None and max_cost < FLOAT32_EXACT_LIMIT else "d"
+        # Zero-filled allocation; g is valid only where the status is not UNSEEN
+        self.g = array(cost_type, bytes(array(cost_type).itemsize * n))
+        self.parent = array("b", bytes(n))
+        self.status = array("B", bytes(n))
+        self._steps = [action.delta()[0] * map.width + action.delta()[1] for action in Action]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.itemsize * len(a) for a in (self.g, self.parent, self.status))
+
+    def cost(self, id: int) -> float:
+        """
+        Return g of the state, infinity if it was not reached yet.
+        """
+        return self.g[id] if self.status[id] != UNSEEN else float("inf")
+
+    def reach(self, id: int, cost: float, parent: int = NO_PARENT) -> None:
+        """
+        Record a better path to the state, reached by the `parent` action, and open the state.
+        """
+        self.g[id] = cost
+        self.parent[id] = parent
+        self.status[id] = OPEN
+
+    def parent_of(self, id: int) -> Optional[int]:
+        action = self.parent[id]
+        return None if action == NO_PARENT else id - self._steps[action]
+
+    def path_to(self, id: int) -> list[State]:
+        """
+        Follow the parent actions from the state back to the start and return the path from the start.
+        """
+        states = self.map.states
+        path = []
+        current: Optional[int] = id
+        while current is not None:
+            path.append(states[current])
+            current = self.parent_of(current)
+        path.reverse()
+        return path
@@ -0,0 +1,128 @@
+from kuimaze2 import State
+from dataclasses import asdict, dataclass
+from enum import IntEnum
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, TextIO
+import json
+import os
+import struct
+
+
+class TraceLevel(IntEnum):
+    """
+    How much a search records: event counts only, or also single events written to a trace file.
+    """
+    COUNTS = 0
+    EXPANSIONS = 1
+    ALL = 2  # Expansions, pushes, stale frontier entries and reopenings
+
+
+class TraceEvent(IntEnum):
+    """
+    Kinds of traced events, with the level from which they are recorded.
+    """
+    EXPAND = 0
+    PUSH = 1
+    STALE = 2
+    REOPEN = 3
+
+    @property
+    def level(self) -> TraceLevel:
+        return TraceLevel.EXPANSIONS if self == TraceEvent.EXPAND else TraceLevel.ALL
+
+
+@dataclass
+class SearchStats:
+    """
+    Statistics of one search; counted at every trace level.
+    """
+    expansions: int = 0
+    pushes: int = 0
+    reopenings: int = 0
+    stale_skipped: int = 0
+    peak_frontier: int = 0
+    elapsed: float = 0.0  # Seconds of wall-clock time
+    path_cost: float = float("inf")
+    path_length: int = 0
+
+
+"""
+Layout of a record of a binary trace: event, row, column, cost (little-endian, 17 bytes).
+"""
+BINARY_RECORD = struct.Struct("<Biid")
+
+"""
+Suffix of trace files written in the binary format; other files are written as JSON lines.
+"""
+BINARY_SUFFIX = ".bin"
+
+
+class Tracer:
+    """
+    Receiver of search events.
+
+    At the default level COUNTS, nothing is written: the search only counts the events in its
+    SearchStats. At higher levels, single events are streamed to a trace file, either as
+    JSON lines ({"event": "expand", "r": 0, "c": 1, "cost": 0.0}, followed by a "stats" line
+    after each search) or, for files with the BINARY_SUFFIX, as BINARY_RECORDs.
+    Use it as a context manager to close the file:
+
+        with Tracer(TraceLevel.EXPANSIONS, "trace.jsonl") as tracer:
+            path, stats = Agent(env, tracer=tracer).find_path_with_stats()
+    """
+
+    def __init__(self, level: TraceLevel = TraceLevel.COUNTS, file: Optional[os.PathLike | str] = None) -> None:
+        if level > TraceLevel.COUNTS and file is None:
+            raise ValueError(f"Tracer: A trace file is needed for the level {level.name}")
+        self.level = level
+        self.path = None if file is None else Path(file)
+        self.binary = self.path is not None and self.path.suffix == BINARY_SUFFIX
+        self._file: Optional[TextIO | BinaryIO] = None
+        if self.path is not None:
+            self._file = open(self.path, "wb" if self.binary else "w")
+
+    def traces(self, event: TraceEvent) -> bool:
+        """
+        Return True if the events of this kind are written; searches check it once, not per event.
+        """
+        return self.level >= event.level
+
+    def record(self, event: TraceEvent, state: State, cost: float) -> None:
+        if self.binary:
+            self._file.write(BINARY_RECORD.pack(event, state.r, state.c, cost))
+        else:
+            self._file.write(f'{{"event": "{event.name.lower()}", "r": {state.r}, "c": {state.c}, "cost": {cost}}}\n')
+
+    def finish(self, stats: SearchStats) -> None:
+        """
+        Mark the end of a search in the trace (JSON lines only).
+        """
+        if self._file is not None and not self.binary:
+            self._file.write(json.dumps({"event": "stats", **asdict(stats)}) + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "Tracer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_trace(file: os.PathLike | str) -> Iterator[dict]:
+    """
+    Read the events of a trace file written by a Tracer, in the JSON lines format in both cases.
+    """
+    path = Path(file)
+    if path.suffix == BINARY_SUFFIX:
+        with open(path, "rb") as f:
+            for event, r, c, cost in BINARY_RECORD.iter_unpack(f.read()):
+                yield {"event": TraceEvent(event).name.lower(), "r": r, "c": c, "cost": cost}
+    else:
+        with open(path) as f:
+            for line in f:
+                yield json.loads(line)